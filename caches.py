@@ -0,0 +1,245 @@
+"""
+caches.py — Кэши данных бирж между циклами
+Hot/cold расписание обновления OI, фандинг по расписанию выплат,
+негативный кэш символов
+"""
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import config
+
+
+@dataclass(slots=True)
+class OIEntry:
+    """OI символа в базовом активе и когда он получен"""
+    amount: float
+    fetched_at: float
+    cycle: int
+
+
+class OICache:
+    """
+    Кэш OI одной биржи с hot/cold расписанием обновления.
+
+    - hot: OI/MCap близко к порогу (≥ OI_HOT_BAND × OI_MCAP_RATIO)
+      → обновляется каждый цикл
+    - cold: далеко от порога → раз в OI_COLD_EVERY циклов
+    - новые символы (без кэша) — первыми
+
+    Фандинг в расчёт не входит: до OI доходят только символы, уже
+    прошедшие фильтр фандинга (StrategyScanner.prefilter).
+
+    Бюджет запросов на цикл тратится на самые ценные символы;
+    остальным отдаётся последнее известное значение. OI хранится
+    в базовом активе: в USD его пересчитывает текущая цена цикла,
+    поэтому кэш не устаревает вместе с ценой.
+    """
+
+    def __init__(self, cold_every: int = 5, budget: int = 0, hot_band: float = 0.5):
+        self.cold_every = max(1, cold_every)
+        self.budget = budget  # 0 = без лимита
+        self.hot_band = hot_band
+        self.entries: Dict[str, OIEntry] = {}
+        self.cycle = 0
+        self.last_fetched = 0
+        self.last_cached = 0
+
+    def _priority(self, row: Dict, entry: OIEntry) -> Tuple[bool, float]:
+        """(hot, ценность обновления) по последнему известному OI"""
+        mcap = row.get("mcap")
+        proximity = 0.0
+        if mcap and mcap > 0:
+            oi_usd = entry.amount * row["futures_price"]
+            proximity = (oi_usd / mcap * 100) / config.OI_MCAP_RATIO
+        hot = proximity >= self.hot_band
+        age = self.cycle - entry.cycle
+        value = min(proximity, 1.0) + age / self.cold_every
+        return hot, value
+
+    def plan(self, rows: List[Dict]) -> Tuple[List[Dict], Dict[str, float]]:
+        """
+        Новый цикл: кого обновить, а кому отдать кэш.
+        Returns: (rows к загрузке, {symbol: OI в базовом активе из кэша})
+        """
+        self.cycle += 1
+        due: List[Tuple[float, Dict]] = []
+        cached: Dict[str, float] = {}
+
+        for row in rows:
+            entry = self.entries.get(row["symbol"])
+            if entry is None:
+                due.append((float("inf"), row))
+                continue
+            hot, value = self._priority(row, entry)
+            interval = 1 if hot else self.cold_every
+            if self.cycle - entry.cycle >= interval:
+                due.append((value, row))
+            else:
+                cached[row["symbol"]] = entry.amount
+
+        due.sort(key=lambda item: item[0], reverse=True)
+        if self.budget > 0 and len(due) > self.budget:
+            for _, row in due[self.budget:]:
+                entry = self.entries.get(row["symbol"])
+                if entry is not None:
+                    cached[row["symbol"]] = entry.amount
+            due = due[:self.budget]
+
+        self.last_fetched = len(due)
+        self.last_cached = len(cached)
+        return [row for _, row in due], cached
+
+    def store(self, values: Dict[str, float], now: float):
+        for symbol, amount in values.items():
+            self.entries[symbol] = OIEntry(amount, now, self.cycle)
+
+
+@dataclass(slots=True)
+class FundingEntry:
+    """Ставка фандинга символа и расписание выплат"""
+    rate: float          # %
+    fetched_at: float
+    next_funding: float  # unix, сек; 0 — биржа не сообщила
+    interval: float      # сек между выплатами; 0 — неизвестен
+
+
+class FundingCache:
+    """
+    Кэш фандинга одной биржи с учётом расписания выплат.
+
+    Ставка почти не меняется между выплатами (1/4/8 ч), поэтому символ
+    требует обновления, только если:
+    - до выплаты меньше near_window (но не больше четверти интервала)
+    - выплата прошла после последнего получения (ставка сменилась)
+    - значение старше max_staleness
+    """
+
+    def __init__(self, max_staleness: float = 300, near_window: float = 600):
+        self.max_staleness = max_staleness
+        self.near_window = near_window
+        self.entries: Dict[str, FundingEntry] = {}
+        self.table_at = 0.0  # последнее обновление всей таблицы
+        self.refreshed = 0
+        self.skipped = 0
+
+    def is_due(self, entry: FundingEntry, now: float) -> bool:
+        if now - entry.fetched_at >= self.max_staleness:
+            return True
+        next_funding = entry.next_funding
+        if not next_funding:
+            return False
+        if entry.fetched_at < next_funding <= now:
+            return True
+        near = self.near_window
+        if entry.interval:
+            near = min(near, entry.interval / 4)
+        return next_funding - now <= near
+
+    def table_due(self, symbols: Iterable[str], now: float) -> bool:
+        """
+        Нужно ли перечитать bulk-таблицу ради этих символов. Символ без
+        значения (новый листинг) — тоже повод; тех, кого биржа в таблице
+        не отдаёт, вызывающий отсеивает негативным кэшем.
+        """
+        if not self.table_at:
+            return True
+        entries = self.entries
+        return any(
+            entry is None or self.is_due(entry, now)
+            for entry in (entries.get(symbol) for symbol in symbols)
+        ) or now - self.table_at >= self.max_staleness
+
+    def due(self, symbols: Iterable[str], now: float) -> List[str]:
+        """Символы к обновлению: без значения — первыми, затем самые давние"""
+        entries = self.entries
+        out = [s for s in symbols if s not in entries or self.is_due(entries[s], now)]
+        out.sort(key=lambda s: entries[s].fetched_at if s in entries else 0.0)
+        return out
+
+    def store(self, symbol: str, rate: float, now: float,
+              next_funding: Optional[float] = None, interval: Optional[float] = None):
+        old = self.entries.get(symbol)
+        if interval is None:
+            interval = old.interval if old else 0.0
+        if not interval and old and next_funding and old.next_funding and next_funding > old.next_funding:
+            interval = next_funding - old.next_funding
+        self.entries[symbol] = FundingEntry(rate, now, next_funding or 0.0, interval or 0.0)
+
+    def rates(self, symbols: Optional[Iterable[str]] = None) -> Dict[str, float]:
+        if symbols is None:
+            return {symbol: entry.rate for symbol, entry in self.entries.items()}
+        entries = self.entries
+        return {s: entries[s].rate for s in symbols if s in entries}
+
+    def get_stats(self) -> dict:
+        return {
+            "entries": len(self.entries),
+            "refreshed": self.refreshed,
+            "skipped": self.skipped,
+        }
+
+
+@dataclass(slots=True)
+class NegativeEntry:
+    """Символ, не отдавший данные эндпоинта, и когда пробовать снова"""
+    failures: int
+    retry_at: float
+    reason: str
+
+
+class NegativeCache:
+    """
+    Негативный кэш (биржа, символ, эндпоинт): NotSupported, BadSymbol,
+    404 или пустой ответ. Такой символ пропускается до retry_at,
+    затем — пробный запрос; снова неудача → пауза ×2 (до max_ttl).
+    Подключение биржи сбрасывает её записи, перезагрузка рынков —
+    записи листингов и делистингов.
+    """
+
+    def __init__(self, ttl: float = 600, max_ttl: float = 21600):
+        self.ttl = ttl
+        self.max_ttl = max_ttl
+        self.entries: Dict[Tuple[str, str, str], NegativeEntry] = {}
+        self.saved: Dict[str, int] = {}    # eid → пропущено запросов
+        self.reprobes: Dict[str, int] = {}  # eid → пробных запросов
+
+    def is_blocked(self, eid: str, symbol: str, endpoint: str, now: float,
+                   count: bool = True) -> bool:
+        """count=False — только проверка, без учёта в saved/reprobes"""
+        entry = self.entries.get((eid, symbol, endpoint))
+        if entry is None:
+            return False
+        blocked = now < entry.retry_at
+        if count:
+            counter = self.saved if blocked else self.reprobes
+            counter[eid] = counter.get(eid, 0) + 1
+        return blocked
+
+    def mark_bad(self, eid: str, symbol: str, endpoint: str, reason: str, now: float):
+        key = (eid, symbol, endpoint)
+        entry = self.entries.get(key)
+        failures = entry.failures + 1 if entry else 1
+        delay = min(self.max_ttl, self.ttl * 2 ** (failures - 1))
+        self.entries[key] = NegativeEntry(failures, now + delay, reason)
+
+    def mark_good(self, eid: str, symbol: str, endpoint: str):
+        self.entries.pop((eid, symbol, endpoint), None)
+
+    def invalidate(self, eid: str, symbols: Optional[Iterable[str]] = None):
+        """Сбросить записи биржи (symbols — только этих символов)"""
+        only = set(symbols) if symbols is not None else None
+        for key in [k for k in self.entries if k[0] == eid and (only is None or k[1] in only)]:
+            del self.entries[key]
+
+    def get_stats(self) -> Dict[str, Dict]:
+        counts: Dict[str, int] = {}
+        for eid, _, _ in self.entries:
+            counts[eid] = counts.get(eid, 0) + 1
+        return {
+            eid: {
+                "blocked": counts.get(eid, 0),
+                "saved": self.saved.get(eid, 0),
+                "reprobes": self.reprobes.get(eid, 0),
+            }
+            for eid in sorted(set(counts) | set(self.saved))
+        }
@@ -26,6 +26,10 @@ MAX_FUNDING_RATE = float(os.getenv("MAX_FUNDING_RATE", "-0.01"))
 # |Futures - Spot| / Spot <= 2% → справедливая цена
 MAX_PRICE_SPREAD = float(os.getenv("MAX_PRICE_SPREAD", "2.0"))
 
+# Референс спреда: "index" — индексная цена перпа из bulk-ответа биржи
+# (спот-запрос только где индекса нет), "spot" — всегда спотовые тикеры
+SPREAD_SOURCE = os.getenv("SPREAD_SOURCE", "index").lower()
+
 # Market Cap >= $3M → не скам/мертвый проект
 MIN_MARKET_CAP = float(os.getenv("MIN_MARKET_CAP", "3000000"))
 
@@ -49,9 +53,95 @@ EXCHANGES = [
 # ═══════════════════════════════════════════
 # Сканирование
 # ═══════════════════════════════════════════
+# У каждой биржи свой цикл: пауза подстраивается под её задержку
+# и бюджет запросов в пределах [SCAN_INTERVAL_MIN, SCAN_INTERVAL], сек
 SCAN_INTERVAL = int(os.getenv("SCAN_INTERVAL", "30"))
+SCAN_INTERVAL_MIN = int(os.getenv("SCAN_INTERVAL_MIN", "10"))
 MCAP_CACHE_TTL = int(os.getenv("MCAP_CACHE_TTL", "300"))
 SIGNAL_COOLDOWN = int(os.getenv("SIGNAL_COOLDOWN", "1800"))
+# Кэш рынков на диске для быстрого старта ("" = выкл) и его срок жизни, сек
+MARKETS_CACHE_DIR = os.getenv("MARKETS_CACHE_DIR", ".cache/markets")
+MARKETS_CACHE_MAX_AGE = int(os.getenv("MARKETS_CACHE_MAX_AGE", "86400"))
+# Фоновая перезагрузка рынков (листинги/делистинги), сек; 0 = выкл
+MARKET_RELOAD_INTERVAL = int(os.getenv("MARKET_RELOAD_INTERVAL", "600"))
+
+# OI по одному символу (Binance, BingX): hot/cold расписание
+# cold-символы обновляются раз в N циклов, hot — каждый цикл
+OI_COLD_EVERY = int(os.getenv("OI_COLD_EVERY", "5"))
+# OI/MCap ≥ OI_HOT_BAND × OI_MCAP_RATIO → символ hot
+OI_HOT_BAND = float(os.getenv("OI_HOT_BAND", "0.5"))
+# Максимум OI-запросов на биржу за цикл (0 = без лимита)
+OI_REQUEST_BUDGET = int(os.getenv("OI_REQUEST_BUDGET", "150"))
+
+# Фандинг по одному символу (нет bulk-эндпоинта): запросов на проход биржи;
+# монеты из MCap-фильтра обходятся по кругу, самые давние — первыми (0 = все)
+FUNDING_FALLBACK_BUDGET = int(os.getenv("FUNDING_FALLBACK_BUDGET", "100"))
+
+# Фандинг по расписанию выплат: значение старше N сек обновляется всегда,
+# за FUNDING_NEAR_WINDOW сек до выплаты (и сразу после) — каждый проход
+FUNDING_MAX_STALENESS = float(os.getenv("FUNDING_MAX_STALENESS", "300"))
+FUNDING_NEAR_WINDOW = float(os.getenv("FUNDING_NEAR_WINDOW", "600"))
+
+# Негативный кэш символов без OI/фандинга: первая пауза и максимум (×2 за неудачу), сек
+NEGATIVE_TTL = float(os.getenv("NEGATIVE_TTL", "600"))
+NEGATIVE_MAX_TTL = float(os.getenv("NEGATIVE_MAX_TTL", "21600"))
+
+# Переподключение упавших бирж: пауза base × 2^попытка (с джиттером), сек
+RECONNECT_BASE_DELAY = float(os.getenv("RECONNECT_BASE_DELAY", "10"))
+RECONNECT_MAX_DELAY = float(os.getenv("RECONNECT_MAX_DELAY", "600"))
+RECONNECT_CHECK_INTERVAL = float(os.getenv("RECONNECT_CHECK_INTERVAL", "5"))
+# Столько циклов подряд без тикеров → биржа переподключается
+RECONNECT_AFTER_ERRORS = int(os.getenv("RECONNECT_AFTER_ERRORS", "5"))
+
+# Цены и фандинги из сырых нативных эндпоинтов (false = унифицированный ccxt)
+RAW_ENDPOINTS = os.getenv("RAW_ENDPOINTS", "true").lower() in ("1", "true", "yes")
+
+# Повторы сетевых ошибок/429: попыток на запрос, повторов на проход биржи,
+# базовая пауза (×2 с джиттером) и пауза биржи после 429 без Retry-After, сек
+RETRY_MAX_ATTEMPTS = int(os.getenv("RETRY_MAX_ATTEMPTS", "3"))
+RETRY_BUDGET = int(os.getenv("RETRY_BUDGET", "30"))
+RETRY_BASE_DELAY = float(os.getenv("RETRY_BASE_DELAY", "0.5"))
+RATE_LIMIT_PAUSE = float(os.getenv("RATE_LIMIT_PAUSE", "2"))
+
+# Circuit breaker на класс эндпоинтов биржи: доля ошибок/медленных (> SLOW_CALL сек)
+# ответов в окне из WINDOW запросов ≥ ERROR_RATE → пауза OPEN_SEC (×2 до MAX_OPEN_SEC)
+BREAKER_WINDOW = int(os.getenv("BREAKER_WINDOW", "20"))
+BREAKER_MIN_CALLS = int(os.getenv("BREAKER_MIN_CALLS", "5"))
+BREAKER_ERROR_RATE = float(os.getenv("BREAKER_ERROR_RATE", "0.5"))
+BREAKER_SLOW_CALL = float(os.getenv("BREAKER_SLOW_CALL", "8"))
+BREAKER_OPEN_SEC = float(os.getenv("BREAKER_OPEN_SEC", "30"))
+BREAKER_MAX_OPEN_SEC = float(os.getenv("BREAKER_MAX_OPEN_SEC", "300"))
+
+# Дедлайн сбора данных одной биржи за цикл, сек: не успели — частичный результат
+FETCH_DEADLINE = float(os.getenv("FETCH_DEADLINE", "20"))
+# Дедлайны этапов, сек: "tickers=8,funding=8,index=6,spot=6,oi=12"
+STAGE_DEADLINES = {
+    "tickers": 8.0, "funding": 8.0, "index": 6.0, "spot": 6.0, "oi": 12.0,
+    **{
+        k.strip(): float(v) for k, v in
+        (item.split("=", 1) for item in os.getenv("STAGE_DEADLINES", "").split(",") if "=" in item)
+    },
+}
+
+# Доля лимита веса биржи, которую разрешено тратить за окно
+RATE_BUDGET_UTILIZATION = float(os.getenv("RATE_BUDGET_UTILIZATION", "0.9"))
+
+# Общий HTTP-пул: соединений всего / на хост, TTL DNS-кэша и keep-alive, сек.
+# На хост — не меньше максимума AIMD-лимита OI (Binance: 40), иначе
+# лимит ограничивается им: ожидание соединения исказило бы задержки
+HTTP_POOL_LIMIT = int(os.getenv("HTTP_POOL_LIMIT", "100"))
+HTTP_POOL_PER_HOST = int(os.getenv("HTTP_POOL_PER_HOST", "40"))
+HTTP_DNS_TTL = int(os.getenv("HTTP_DNS_TTL", "300"))
+HTTP_KEEPALIVE = float(os.getenv("HTTP_KEEPALIVE", "60"))
+
+# WebSocket-стримы тикеров и фандинга вместо поллинга (Binance, Bybit)
+STREAMING = os.getenv("STREAMING", "false").lower() in ("1", "true", "yes")
+# Таблица стрима старше N секунд → фоллбэк на REST
+STREAM_MAX_AGE = float(os.getenv("STREAM_MAX_AGE", "15"))
+# Подмена URL стримов, напр. "binance=ws://127.0.0.1:8765" (стенд stream_replay.py)
+STREAM_URLS = dict(
+    item.split("=", 1) for item in os.getenv("STREAM_URLS", "").split(",") if "=" in item
+)
 
 # CoinGecko
 COINGECKO_API_KEY = os.getenv("COINGECKO_API_KEY", "")
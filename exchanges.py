@@ -3,14 +3,135 @@ exchanges.py — Высокопроизводительный модуль ра
 Batch-загрузка OI, funding, тикеров за ОДИН запрос на биржу
 """
 import asyncio
+import contextlib
 import ccxt.async_support as ccxt
 import logging
+import random
 import time
-from typing import Dict, List, Optional, Any, Tuple
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import config
+import jsondecode
+import market_cache
+import venues
+from caches import FundingCache, NegativeCache, OICache
+from health import (
+    SYMBOL_ERRORS, VENUE_ERRORS, CircuitOpenError, ExchangeHealth, SymbolNotFound,
+    endpoint_class, is_not_found,
+)
+from ratelimit import AdaptiveLimiter, RetryPolicy, WeightBudget, budget_for
+from streaming import MarketStream
+from transport import SharedTransport
 
 logger = logging.getLogger("oi_scanner")
 
 
+class ExchangeSnapshot:
+    """
+    Снапшот одной биржи на один цикл.
+
+    Каждый bulk-ресурс (тикеры, фандинги, спот, нативные эндпоинты) грузится
+    ровно один раз: повторные и конкурентные вызовы ждут тот же запрос
+    (single-flight) и получают тот же результат.
+
+    Дедлайн этапа запрос не отменяет (shield) — это делает close(), когда
+    снапшот сменяется новым: зависший запрос не дублирует следующий цикл.
+    """
+
+    def __init__(self, eid: str):
+        self.eid = eid
+        self.created = time.time()
+        self._results: Dict[str, asyncio.Future] = {}
+
+    async def get(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        fut = self._results.get(key)
+        if fut is None:
+            fut = asyncio.ensure_future(loader())
+            # Ошибку брошенного по дедлайну запроса никто не ждёт — забираем её
+            fut.add_done_callback(self._consume)
+            self._results[key] = fut
+        # shield: отмена одного ожидающего не отменяет общий запрос
+        return await asyncio.shield(fut)
+
+    @staticmethod
+    def _consume(fut: asyncio.Future):
+        if not fut.cancelled():
+            fut.exception()
+
+    def close(self):
+        """Отменить незавершённые запросы снапшота"""
+        for fut in self._results.values():
+            if not fut.done():
+                fut.cancel()
+
+
+class StageGraph:
+    """
+    Этапы прохода биржи как граф зависимостей.
+
+    Этап стартует, как только готовы его зависимости, — независимые
+    этапы идут параллельно. Для каждого пишется (начало, конец) от старта
+    графа; summary() показывает тайминги и критический путь.
+    Зависимости добавляются раньше зависящих от них этапов.
+    """
+
+    def __init__(self):
+        self._stages: Dict[str, Tuple[Callable[[], Awaitable[Any]], Tuple[str, ...]]] = {}
+        self.results: Dict[str, Any] = {}
+        self.timings: Dict[str, Tuple[float, float]] = {}
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._stages
+
+    def add(self, name: str, fn: Callable[[], Awaitable[Any]], *deps: str):
+        self._stages[name] = (fn, deps)
+
+    async def run(self) -> Dict[str, Any]:
+        t0 = time.monotonic()
+        tasks: Dict[str, asyncio.Future] = {}
+
+        async def run_stage(name: str):
+            fn, deps = self._stages[name]
+            if deps:
+                await asyncio.gather(*(tasks[d] for d in deps))
+            start = time.monotonic() - t0
+            try:
+                self.results[name] = await fn()
+            finally:
+                self.timings[name] = (start, time.monotonic() - t0)
+
+        for name in self._stages:
+            tasks[name] = asyncio.ensure_future(run_stage(name))
+        try:
+            await asyncio.gather(*tasks.values())
+        finally:
+            for task in tasks.values():
+                task.cancel()
+        return self.results
+
+    def critical_path(self) -> List[str]:
+        """Цепочка этапов, определившая длительность прохода"""
+        if not self.timings:
+            return []
+        name = max(self.timings, key=lambda n: self.timings[n][1])
+        path = [name]
+        while True:
+            deps = [d for d in self._stages[name][1] if d in self.timings]
+            if not deps:
+                break
+            name = max(deps, key=lambda d: self.timings[d][1])
+            path.append(name)
+        return path[::-1]
+
+    def summary(self) -> str:
+        stages = " ".join(
+            f"{name} {end - start:.2f}с" for name, (start, end) in
+            sorted(self.timings.items(), key=lambda item: item[1][0])
+        )
+        return f"{stages} | путь: {' → '.join(self.critical_path())}"
+
+
 class ExchangeManager:
     """
     Управление подключениями к биржам и **batch**-сбор данных.
@@ -18,9 +139,17 @@ class ExchangeManager:
     Оптимизации:
     - fetch_tickers() → ВСЕ тикеры одним запросом
     - fetch_funding_rates() → ВСЕ фандинги одним запросом
+    - Цены и фандинги из сырых нативных ответов (ccxt-парсинг — фоллбэк)
     - fetch_open_interest() → батч где биржа поддерживает
-    - Семафоры для rate-limit контроля
+    - Адаптивные (AIMD) лимиты параллельности для rate-limit контроля
+    - Бюджет веса запросов по заголовкам биржи вместо throttle ccxt
     - Кэш рынков, пересканирование раз в 10 мин
+    - WS-стримы тикеров/фандинга вместо поллинга (STREAMING)
+    - Фоновое переподключение упавших бирж
+    - Общий HTTP-пул (keep-alive, DNS-кэш) на всех клиентов
+    - Дедлайны на биржу и на этап: зависшая биржа не держит цикл
+    - Circuit breaker по классам эндпоинтов и оценка здоровья биржи
+    - Повторы с джиттером вне слота лимита, пауза биржи после 429
     """
 
     EXCHANGE_NAMES = {
@@ -34,29 +163,88 @@ class ExchangeManager:
         "bitget": "Bitget",
     }
 
-    # Максимум параллельных OI-запросов на биржу
+    # Стартовый лимит параллельных OI-запросов на биржу (дальше — AIMD)
     OI_CONCURRENCY = 5
+    OI_CONCURRENCY_START = {"binance": 10, "bingx": 2}
+    OI_CONCURRENCY_MAX = {"binance": 40, "bingx": 5}
 
-    def __init__(self, exchange_ids: List[str]):
+    def __init__(self, exchange_ids: List[str], transport: Optional[SharedTransport] = None):
         self.exchange_ids = exchange_ids
+        self.transport = transport
         self.exchanges: Dict[str, Any] = {}
+        self.spot_exchanges: Dict[str, Any] = {}  # долгоживущие спот-клиенты
         self._init_errors: Dict[str, str] = {}
         # Кэшированные данные
         self._futures_symbols_cache: Dict[str, List[Dict]] = {}
         self._ticker_cache: Dict[str, Dict[str, Dict]] = {}   # eid → {symbol: ticker}
-        self._funding_cache: Dict[str, Dict[str, float]] = {} # eid → {symbol: rate%}
-        self._oi_cache: Dict[str, Dict[str, float]] = {}      # eid → {symbol: oi_usd}
+        self._funding_cache: Dict[str, FundingCache] = {}    # eid → фандинг по расписанию выплат
+        self._oi_cache: Dict[str, OICache] = {}               # eid → hot/cold кэш OI
+        # (eid, symbol, эндпоинт) без данных → не спрашиваем до пробы
+        self._negative = NegativeCache(ttl=config.NEGATIVE_TTL, max_ttl=config.NEGATIVE_MAX_TTL)
         self._spot_ticker_cache: Dict[str, Dict[str, float]] = {}  # eid → {BASE: price}
-        # Семафоры
-        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._snapshots: Dict[str, ExchangeSnapshot] = {}     # eid → снапшот текущего цикла
+        self.streams: Dict[str, MarketStream] = {}            # eid → WS-стрим (STREAMING)
+        # Адаптивные лимиты параллельности (AIMD)
+        self._limiters: Dict[str, AdaptiveLimiter] = {}
+        # Бюджеты веса запросов (вместо throttle ccxt)
+        self._budgets: Dict[str, WeightBudget] = {}
+        # Фоновые задачи (подключение, перезагрузка рынков и т.п.)
+        self._init_tasks: List[asyncio.Task] = []
+        self._background: List[asyncio.Task] = []
+        self._market_diffs: Dict[str, Dict] = {}  # eid → последний дифф листингов
+        # Супервизор переподключений
+        self._consecutive_errors: Dict[str, int] = {}  # eid → циклов подряд без тикеров
+        self._retry_attempts: Dict[str, int] = {}
+        self._retry_at: Dict[str, float] = {}
+        self._reconnect_events: deque = deque(maxlen=20)  # (ts, eid, событие)
+        # Дедлайны: eid → {этап: сколько раз не уложился}, символы без данных
+        self._missed_deadlines: Dict[str, Dict[str, int]] = {}
+        self._missing: Dict[str, List[str]] = {}
+        self._stage_timings: Dict[str, str] = {}  # eid → тайминги этапов последнего прохода
+        # Circuit breaker'ы и здоровье бирж
+        self._health: Dict[str, ExchangeHealth] = {}
+        # Повторы и пауза после 429
+        self._retries: Dict[str, RetryPolicy] = {}
 
     async def initialize(self):
         """Инициализация подключений ко всем биржам параллельно"""
-        tasks = [self._init_exchange(eid) for eid in self.exchange_ids]
-        await asyncio.gather(*tasks, return_exceptions=True)
+        self.start_initialize()
+        await asyncio.gather(*self._init_tasks, return_exceptions=True)
+
+    def start_initialize(self):
+        """
+        Прогрессивный старт: биржи подключаются в фоне, каждая попадает
+        в get_connected_exchanges() сразу после загрузки своих рынков.
+        """
+        self._init_tasks = [asyncio.create_task(self._init_exchange(eid)) for eid in self.exchange_ids]
+        if config.MARKET_RELOAD_INTERVAL > 0:
+            self._background.append(asyncio.create_task(self._market_reload_loop()))
+        self._background.append(asyncio.create_task(self._reconnect_loop()))
+
+    async def wait_first_connected(self) -> bool:
+        """Дождаться первой подключённой биржи (False — не подключилась ни одна)"""
+        pending = set(self._init_tasks)
+        while pending and not self.exchanges:
+            _, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        return bool(self.exchanges)
+
+    def _start_stream(self, eid: str):
+        """Запустить WS-стрим биржи, если она его поддерживает"""
+        if eid in self.streams or not MarketStream.supports(eid):
+            return
+        market_ids = [p["id"] for p in self._futures_symbols_cache.get(eid, [])]
+        session = self.transport.open() if self.transport is not None else None
+        stream = MarketStream(eid, market_ids, url=config.STREAM_URLS.get(eid), session=session)
+        stream.start()
+        self.streams[eid] = stream
+        logger.info(f"🔌 {self.EXCHANGE_NAMES.get(eid, eid)}: WS-стрим {stream.url}")
 
-    async def _init_exchange(self, eid: str):
-        """Подключиться к одной бирже"""
+    async def _init_exchange(self, eid: str, live: bool = False):
+        """
+        Подключиться к одной бирже. live=True — рынки только с биржи
+        (переподключение: файл кэша не доказывает, что биржа поднялась).
+        """
+        exchange = None
         try:
             exchange_class = getattr(ccxt, eid, None)
             if not exchange_class:
@@ -64,34 +252,133 @@ class ExchangeManager:
                 logger.warning(f"⚠️  Биржа {eid} не найдена в CCXT")
                 return
 
-            exchange = exchange_class({
-                "enableRateLimit": True,
+            exchange = exchange_class(self._client_config({
+                "enableRateLimit": False,  # темп держит WeightBudget
                 "timeout": 15000,
                 "options": {
                     "defaultType": "swap",
                     "adjustForTimeDifference": True,
                 },
-            })
+            }))
+
+            # Новое подключение — breaker'ы с чистого листа
+            self._health.pop(eid, None)
 
-            await exchange.load_markets()
+            # При переподключении бюджет сохраняется: расход окна никуда не делся
+            if eid not in self._budgets:
+                self._budgets[eid] = budget_for(eid, exchange.rateLimit, config.RATE_BUDGET_UTILIZATION)
+
+            # Спот-клиент грузит рынки параллельно и не валит подключение;
+            # провал swap отменяет его, чтобы спот не пережил неудачную биржу
+            spot_task = asyncio.create_task(self._init_spot(eid, live))
+            try:
+                warm = await self._load_client_markets(eid, "swap", exchange, live)
+                await spot_task
+            except BaseException:
+                spot_task.cancel()
+                await asyncio.gather(spot_task, return_exceptions=True)
+                raise
             self.exchanges[eid] = exchange
-            self._semaphores[eid] = asyncio.Semaphore(self.OI_CONCURRENCY)
+            self._negative.invalidate(eid)
+            self._init_errors.pop(eid, None)
+            self._consecutive_errors[eid] = 0
+            max_limit = self.OI_CONCURRENCY_MAX.get(eid, 20)
+            # Сверх лимита соединений на хост запрос ждал бы соединение
+            # внутри слота — AIMD и breaker приняли бы это за задержку биржи
+            if self.transport is not None and self.transport.limit_per_host:
+                max_limit = min(max_limit, self.transport.limit_per_host)
+            self._limiters[eid] = AdaptiveLimiter(
+                initial=min(self.OI_CONCURRENCY_START.get(eid, self.OI_CONCURRENCY), max_limit),
+                max_limit=max_limit,
+            )
 
             # Кэшируем фьючерсные символы
             self._cache_futures_symbols(eid)
 
             futures_count = len(self._futures_symbols_cache.get(eid, []))
-            logger.info(f"✅ {self.EXCHANGE_NAMES.get(eid, eid)}: {futures_count} USDT-перпов")
+            source = " (рынки с диска)" if warm else ""
+            logger.info(f"✅ {self.EXCHANGE_NAMES.get(eid, eid)}: {futures_count} USDT-перпов{source}")
+
+            if config.STREAMING:
+                self._start_stream(eid)
+
+            # Рынки из файла — сверяем с биржей в фоне, сканирование уже идёт
+            if warm:
+                self._background.append(asyncio.create_task(self.reload_markets(eid)))
+
+        except asyncio.CancelledError:
+            # Остановка во время подключения — не оставляем открытых сессий
+            if eid not in self.exchanges:
+                await self._close_failed(eid, exchange)
+            raise
 
         except Exception as e:
             self._init_errors[eid] = str(e)[:80]
             logger.error(f"❌ {self.EXCHANGE_NAMES.get(eid, eid)}: {e}")
+            await self._close_failed(eid, exchange)
+
+    async def _close_failed(self, eid: str, exchange: Any):
+        """Закрыть клиентов неудавшегося подключения (подключённый swap не трогаем)"""
+        if exchange is not None and self.exchanges.get(eid) is not exchange:
+            await self._safe_close(exchange)
+        spot_exchange = self.spot_exchanges.pop(eid, None)
+        if spot_exchange:
+            await self._safe_close(spot_exchange)
+
+    async def _init_spot(self, eid: str, live: bool = False):
+        """Долгоживущий спот-клиент: одна HTTP-сессия и кэш рынков на всё время работы"""
+        spot_exchange = getattr(ccxt, eid)(self._client_config({
+            "enableRateLimit": False,
+            "timeout": 10000,
+            "options": {"defaultType": "spot"},
+        }))
+        try:
+            await self._load_client_markets(eid, "spot", spot_exchange, live)
+            self.spot_exchanges[eid] = spot_exchange
+        except asyncio.CancelledError:
+            await self._safe_close(spot_exchange)
+            raise
+        except Exception as e:
+            logger.debug(f"Спот-клиент {eid}: {e}")
+            await self._safe_close(spot_exchange)
+
+    def _client_config(self, params: Dict) -> Dict:
+        """Конфиг ccxt-клиента: общая сессия пула и быстрый JSON-декодер"""
+        if self.transport is not None:
+            params["session"] = self.transport.open()
+        params["on_json_response"] = jsondecode.loads
+        return params
+
+    async def _load_client_markets(self, eid: str, kind: str, client: Any,
+                                   live: bool = False) -> bool:
+        """
+        Рынки клиента: из файла кэша (True) или с биржи (False)
+        с сохранением в файл для следующего старта. live — минуя файл.
+        """
+        if config.MARKETS_CACHE_DIR and not live:
+            cached = await asyncio.to_thread(market_cache.load, eid, kind)
+            if cached:
+                client.set_markets(cached["markets"], cached["currencies"])
+                return True
 
-    def _cache_futures_symbols(self, eid: str):
-        """Кэшировать список USDT-perp символов для биржи"""
+        await self._request(eid, "markets", client.load_markets, client=client)
+        await self._save_markets(eid, kind, client)
+        return False
+
+    @staticmethod
+    async def _save_markets(eid: str, kind: str, client: Any):
+        if config.MARKETS_CACHE_DIR:
+            await asyncio.to_thread(market_cache.save, eid, kind, client)
+
+    def _cache_futures_symbols(self, eid: str) -> Tuple[List[str], List[str]]:
+        """
+        Кэшировать список USDT-perp символов для биржи.
+        Список заменяется целиком (атомарно для сканирования).
+        Returns: (добавленные, удалённые) символы относительно прошлого списка
+        """
         exchange = self.exchanges.get(eid)
         if not exchange:
-            return
+            return [], []
 
         pairs = []
         for symbol, market in exchange.markets.items():
@@ -103,16 +390,153 @@ class ExchangeManager:
             if is_swap and is_usdt and is_active and (is_linear or market.get("quote") == "USDT"):
                 pairs.append({
                     "symbol": symbol,
+                    "id": market.get("id", symbol),
                     "base": market.get("base", symbol.split("/")[0] if "/" in symbol else symbol),
+                    "contract_size": float(market.get("contractSize") or 1),
                     "exchange": eid,
                 })
 
+        old_symbols = {p["symbol"] for p in self._futures_symbols_cache.get(eid, [])}
+        new_symbols = {p["symbol"] for p in pairs}
         self._futures_symbols_cache[eid] = pairs
+        return sorted(new_symbols - old_symbols), sorted(old_symbols - new_symbols)
+
+    # ──── Супервизор переподключений ────
+
+    async def _reconnect_loop(self):
+        """
+        Переподключать упавшие биржи (ошибка init или RECONNECT_AFTER_ERRORS
+        циклов подряд без тикеров) с экспоненциальной паузой и джиттером.
+        Удачно подключённая биржа сразу попадает в get_connected_exchanges().
+        """
+        while True:
+            await asyncio.sleep(config.RECONNECT_CHECK_INTERVAL)
+
+            for eid, errors in list(self._consecutive_errors.items()):
+                if eid in self.exchanges and errors >= config.RECONNECT_AFTER_ERRORS:
+                    await self._disconnect(eid, f"{errors} циклов подряд с ошибками")
+
+            now = time.time()
+            pending = [
+                eid for eid, err in self._init_errors.items()
+                if eid not in self.exchanges and err != "not in ccxt"
+                and now >= self._retry_at.setdefault(eid, now + self._retry_delay(eid))
+            ]
+            if pending:
+                await asyncio.gather(*[self._reconnect(eid) for eid in pending])
+
+    async def _reconnect(self, eid: str):
+        name = self.EXCHANGE_NAMES.get(eid, eid)
+        attempt = self._retry_attempts.get(eid, 0) + 1
+        logger.info(f"🔁 {name}: переподключение, попытка {attempt}")
+        await self._init_exchange(eid, live=True)
+        if eid in self.exchanges:
+            self._retry_attempts.pop(eid, None)
+            self._retry_at.pop(eid, None)
+            self._reconnect_events.append((time.time(), eid, "подключена"))
+        else:
+            self._retry_attempts[eid] = attempt
+            self._retry_at[eid] = time.time() + self._retry_delay(eid)
+            self._reconnect_events.append((time.time(), eid, f"попытка {attempt} не удалась"))
+
+    def _retry_delay(self, eid: str) -> float:
+        """Экспоненциальная пауза с джиттером: 50–100% от base × 2^попытка"""
+        attempt = self._retry_attempts.get(eid, 0)
+        delay = min(config.RECONNECT_MAX_DELAY, config.RECONNECT_BASE_DELAY * 2 ** attempt)
+        return delay * random.uniform(0.5, 1.0)
+
+    async def _disconnect(self, eid: str, reason: str):
+        """Вывести биржу из ротации и закрыть клиентов; дальше её поднимет супервизор"""
+        name = self.EXCHANGE_NAMES.get(eid, eid)
+        logger.warning(f"⚠️  {name}: отключаю ({reason}), переподключение в фоне")
+        exchange = self.exchanges.pop(eid, None)
+        spot_exchange = self.spot_exchanges.pop(eid, None)
+        stream = self.streams.pop(eid, None)
+        snapshot = self._snapshots.pop(eid, None)
+        if snapshot is not None:
+            snapshot.close()
+        self._init_errors[eid] = reason
+        self._consecutive_errors[eid] = 0
+        self._reconnect_events.append((time.time(), eid, "отключена"))
+        if stream:
+            await stream.stop()
+        for client in (exchange, spot_exchange):
+            if client:
+                await self._safe_close(client)
+
+    # ──── Фоновая перезагрузка рынков ────
+
+    async def _market_reload_loop(self):
+        """Раз в MARKET_RELOAD_INTERVAL перечитать рынки всех подключённых бирж"""
+        while True:
+            await asyncio.sleep(config.MARKET_RELOAD_INTERVAL)
+            await asyncio.gather(
+                *[self.reload_markets(eid) for eid in list(self.exchanges)],
+                return_exceptions=True,
+            )
+
+    async def reload_markets(self, eid: str):
+        """
+        Перечитать рынки биржи без паузы сканирования: ccxt подменяет
+        словарь рынков целиком, кэш символов — одним присваиванием.
+        """
+        exchange = self.exchanges.get(eid)
+        if not exchange:
+            return
+        name = self.EXCHANGE_NAMES.get(eid, eid)
+        try:
+            await self._request(eid, "markets", lambda: exchange.load_markets(reload=True))
+            await self._save_markets(eid, "swap", exchange)
+            spot_exchange = self.spot_exchanges.get(eid)
+            if spot_exchange:
+                await self._request(
+                    eid, "markets", lambda: spot_exchange.load_markets(reload=True),
+                    client=spot_exchange,
+                )
+                await self._save_markets(eid, "spot", spot_exchange)
+        except Exception as e:
+            logger.warning(f"⚠️  Перезагрузка рынков {name}: {e}")
+            return
+
+        added, removed = self._cache_futures_symbols(eid)
+        if not added and not removed:
+            return
+        # Символы, чей листинг поменялся, пробуем заново; остальные
+        # продолжают экспоненциальную паузу негативного кэша
+        self._negative.invalidate(eid, added + removed)
+
+        self._market_diffs[eid] = {"added": added, "removed": removed, "at": time.time()}
+        logger.info(
+            f"🔄 {name}: +{len(added)} листингов {', '.join(added[:5])} | "
+            f"−{len(removed)} делистингов {', '.join(removed[:5])}"
+        )
+        self._on_markets_changed(eid, removed)
+
+    def _on_markets_changed(self, eid: str, removed: List[str]):
+        """Убрать делистнутые символы из кэшей и обновить подписки стрима"""
+        oi_cache = self._oi_cache.get(eid)
+        if oi_cache:
+            for symbol in removed:
+                oi_cache.entries.pop(symbol, None)
+        funding = self._funding_cache.get(eid)
+        if funding:
+            for symbol in removed:
+                funding.entries.pop(symbol, None)
+        stream = self.streams.get(eid)
+        if stream:
+            # Новые подписки применятся при переподключении стрима
+            stream.market_ids = [p["id"] for p in self._futures_symbols_cache.get(eid, [])]
 
     async def close(self):
         """Закрыть все сессии параллельно"""
+        tasks = [*self._init_tasks, *self._background]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for stream in self.streams.values():
+            await stream.stop()
         tasks = []
-        for exchange in self.exchanges.values():
+        for exchange in [*self.exchanges.values(), *self.spot_exchanges.values()]:
             tasks.append(self._safe_close(exchange))
         if tasks:
             await asyncio.gather(*tasks, return_exceptions=True)
@@ -128,22 +552,37 @@ class ExchangeManager:
     # BATCH-загрузка данных (весь ключ к скорости)
     # ═══════════════════════════════════════════
 
-    async def fetch_all_data(self, eid: str, target_bases: set = None) -> Dict[str, Dict]:
+    async def fetch_all_data(self, eid: str, target_bases: set = None,
+                             prefilter: Optional[Callable[..., List[Dict]]] = None) -> Dict[str, Dict]:
         """
         Загрузить ВСЕ данные по бирже batch-запросами.
         
         Делает всего 3-4 HTTP-запроса вместо N*4 на каждый символ:
         1. fetch_tickers()      → все цены разом
         2. fetch_funding_rates() → все фандинги разом
-        3. fetch_open_interest() → батч или по одному с семафором
-        4. fetch_tickers(spot)   → спот-цены (опционально)
+        3. index prices         → референс спреда из bulk-ответа (SPREAD_SOURCE=index)
+        4. prefilter            → дешёвые фильтры по bulk-данным
+        5. fetch_tickers(spot)   → спот-цены для выживших без индекса
+        6. fetch_open_interest() → OI только для выживших
+        7. сборка: OI в USD по цене тикеров этого цикла
+
+        Этапы — граф зависимостей (StageGraph): 1–3, а также спот без индекса
+        и bulk-OI, загружаются параллельно; 4 ждёт 1–3, 5 ждёт 4, 6 ждёт 5.
+        Тайминги этапов и критический путь — get_stage_timings().
         
         Args:
             eid: ID биржи
             target_bases: если задано, загружаем OI только для этих монет (оптимизация)
+            prefilter: prefilter(rows, stages=None) → выжившие rows
+                (см. StrategyScanner.prefilter)
             
+        Дедлайны: вся биржа укладывается в FETCH_DEADLINE, каждый этап —
+        в STAGE_DEADLINES. Этап, не успевший к сроку, отдаёт то, что успел
+        (OI — уже полученные символы), остальные символы попадают в
+        get_missing(eid), промах считается в get_missed_deadlines().
+
         Returns:
-            {symbol: {oi_usd, funding_rate, futures_price, spot_price, base, exchange, ...}}
+            {symbol: {oi_usd, oi_amount, funding_rate, futures_price, spot_price, base, exchange, ...}}
         """
         exchange = self.exchanges.get(eid)
         if not exchange:
@@ -151,66 +590,393 @@ class ExchangeManager:
 
         name = self.EXCHANGE_NAMES.get(eid, eid)
         start = time.time()
+        deadline = start + config.FETCH_DEADLINE
+        self.begin_snapshot(eid)
+        retry = self._retry_of(eid)
+        retry.new_cycle()
+        saved_before = self._negative.saved.get(eid, 0)
 
-        # 1. Batch: все фьючерсные тикеры
-        tickers = await self._fetch_all_tickers(eid)
-        
-        # 2. Batch: все funding rates
-        funding_rates = await self._fetch_all_funding_rates(eid)
+        target_pairs = self._target_pairs(eid, target_bases)
+        use_index = config.SPREAD_SOURCE == "index" and (
+            venues.find_endpoint(eid, "index") is not None or eid in self.streams
+        )
+        graph = StageGraph()
 
-        # 3. Определяем для каких символов нужен OI
-        futures_pairs = self._futures_symbols_cache.get(eid, [])
-        if target_bases:
-            target_pairs = [p for p in futures_pairs if p["base"] in target_bases]
-        else:
-            target_pairs = futures_pairs
+        # 1–3. Независимые bulk-этапы — параллельно
+        async def load_tickers():
+            tickers = await self._stage(eid, "tickers", self._fetch_all_tickers(eid), deadline) or {}
+            if tickers:
+                self._consecutive_errors[eid] = 0
+            else:
+                self._consecutive_errors[eid] = self._consecutive_errors.get(eid, 0) + 1
+            return tickers
 
-        # 4. OI — с семафором (может быть по-одному)
-        oi_data = await self._fetch_oi_batch(eid, target_pairs)
+        async def load_funding():
+            return await self._stage(
+                eid, "funding", self._fetch_all_funding_rates(eid, target_bases), deadline,
+            ) or {}
 
-        # 5. Спотовые цены — пытаемся batch
-        spot_prices = await self._fetch_spot_prices(eid, target_bases or set())
+        async def load_index():
+            # Индексные цены — референс для спреда без отдельного спот-запроса
+            if not use_index:
+                return {}
+            return await self._stage(eid, "index", self._fetch_index_prices(eid), deadline) or {}
 
-        # 6. Собираем результат
-        result = {}
-        for pair in target_pairs:
-            symbol = pair["symbol"]
-            base = pair["base"]
+        graph.add("tickers", load_tickers)
+        graph.add("funding", load_funding)
+        graph.add("index", load_index)
 
-            futures_price = tickers.get(symbol)
-            funding_rate = funding_rates.get(symbol)
-            oi_usd = oi_data.get(symbol)
+        # Без индекса спот нужен почти всем кандидатам — грузим его сразу,
+        # а bulk-OI не зависит от фильтров; оба ложатся в снапшот цикла
+        if not use_index and eid in self.spot_exchanges:
+            graph.add("spot_prefetch", lambda: self._stage(
+                eid, "spot", self._fetch_spot_table(eid), deadline, count=False,
+            ))
+        oi_endpoint = venues.find_endpoint(eid, "oi")
+        if oi_endpoint:
+            graph.add("oi_prefetch", lambda: self._stage(
+                eid, "oi", self._prefetch_raw(eid, oi_endpoint), deadline, count=False,
+            ))
+
+        # 4. Кандидаты: пары с ценой и фандингом, дешёвые фильтры
+        async def build_candidates():
+            tickers = graph.results["tickers"]
+            funding_rates = graph.results["funding"]
+            index_prices = graph.results["index"]
+            rows = []
+            for pair in target_pairs:
+                symbol = pair["symbol"]
+                futures_price = tickers.get(symbol)
+                funding_rate = funding_rates.get(symbol)
+                if futures_price is None or funding_rate is None or futures_price <= 0:
+                    continue
+                rows.append({
+                    "exchange": eid,
+                    "exchange_name": name,
+                    "symbol": symbol,
+                    "base": pair["base"],
+                    "funding_rate": funding_rate,
+                    "futures_price": futures_price,
+                    "spot_price": index_prices.get(symbol),
+                    "_pair": pair,
+                })
+            # Дешёвые фильтры до дорогих запросов (спред — где есть индекс)
+            return prefilter(rows) if prefilter else rows
 
-            # Пропускаем если нет ключевых данных
-            if futures_price is None or funding_rate is None or oi_usd is None:
+        graph.add("candidates", build_candidates, "tickers", "funding", "index")
+
+        # 5. Спотовые цены — фоллбэк для выживших без индекса; затем фильтр спреда
+        async def apply_spot():
+            rows = graph.results["candidates"]
+            with_ref = [r for r in rows if r["spot_price"] is not None]
+            no_ref = [r for r in rows if r["spot_price"] is None]
+            if not no_ref:
+                return rows
+            spot_prices = await self._stage(
+                eid, "spot", self._fetch_spot_prices(eid, {r["base"] for r in no_ref}), deadline,
+            ) or {}
+            if spot_prices:
+                for row in no_ref:
+                    row["spot_price"] = spot_prices.get(row["base"])
+                if prefilter:
+                    rows = with_ref + prefilter(no_ref, stages=["spread"])
+            return rows
+
+        graph.add("spot", apply_spot, "candidates", *(["spot_prefetch"] if "spot_prefetch" in graph else []))
+
+        # 6. OI — только для выживших (bulk или по hot/cold расписанию)
+        async def load_oi():
+            return await self._fetch_oi_scheduled(eid, graph.results["spot"], deadline)
+
+        graph.add("oi", load_oi, "spot", *(["oi_prefetch"] if "oi_prefetch" in graph else []))
+
+        await graph.run()
+        rows = graph.results["spot"]
+        oi_data = graph.results["oi"]
+        self._stage_timings[eid] = graph.summary()
+
+        # 7. Собираем результат (без OI к дедлайну — в missing).
+        # OI в базовом активе → USD по свежей цене тикеров этого цикла:
+        # кэшированный OI не тянет за собой вчерашнюю цену
+        result = {}
+        missing = []
+        for row in rows:
+            oi_amount = oi_data.get(row["symbol"])
+            if oi_amount is None:
+                missing.append(row["symbol"])
                 continue
-            if futures_price <= 0 or oi_usd <= 0:
+            if oi_amount <= 0:
                 continue
+            del row["_pair"]
+            row["oi_amount"] = oi_amount
+            row["oi_usd"] = oi_amount * row["futures_price"]
+            result[row["symbol"]] = row
 
-            result[symbol] = {
-                "exchange": eid,
-                "exchange_name": name,
-                "symbol": symbol,
-                "base": base,
-                "oi_usd": oi_usd,
-                "funding_rate": funding_rate,
-                "futures_price": futures_price,
-                "spot_price": spot_prices.get(base),
-            }
+        self._missing[eid] = missing
 
         elapsed = time.time() - start
-        logger.info(f"   📡 {name}: {len(result)} монет с данными за {elapsed:.1f}с")
+        oi_cache = self._oi_cache.get(eid)
+        cache_str = f" | 🗄 {oi_cache.last_fetched} запр./{oi_cache.last_cached} кэш" if oi_cache else ""
+        missing_str = f" | ⏳ без OI: {len(missing)}" if missing else ""
+        retry_str = f" | ↻ {retry.recovered}/{retry.retried}" if retry.retried else ""
+        saved = self._negative.saved.get(eid, 0) - saved_before
+        retry_str += f" | 🚫 {saved}" if saved else ""
+        score = self.get_health_score(eid)
+        health_str = f" | 🩺 {score:g}" if score < 1 else ""
+        logger.info(
+            f"   📡 {name}: {len(result)} монет с данными за {elapsed:.1f}с "
+            f"(OI для {len(rows)}/{len(target_pairs)}{cache_str}{missing_str}{retry_str}) | ⚡ {self._limiters[eid].current}"
+            f" | ⚖️ {self._budget_str(eid)}{health_str}"
+        )
+        logger.info(f"      ⏱ {self._stage_timings[eid]}")
 
         return result
 
+    # ──── Дедлайны ────
+
+    async def _stage(self, eid: str, stage: str, aw: Awaitable[Any], deadline: float,
+                     count: bool = True) -> Any:
+        """
+        Этап fetch_all_data в пределах своего дедлайна и общего дедлайна биржи.
+        Не уложился — None (этап отменяется), промах засчитывается бирже.
+        count=False — предзагрузка: её промах засчитает основной этап,
+        ждущий тот же запрос из снапшота.
+        """
+        timeout = min(config.STAGE_DEADLINES.get(stage, config.FETCH_DEADLINE), deadline - time.time())
+        try:
+            return await asyncio.wait_for(aw, max(0.0, timeout))
+        except asyncio.TimeoutError:
+            if not count:
+                return None
+            missed = self._missed_deadlines.setdefault(eid, {})
+            missed[stage] = missed.get(stage, 0) + 1
+            logger.warning(f"⏳ {self.EXCHANGE_NAMES.get(eid, eid)}: дедлайн этапа {stage} ({timeout:.1f}с)")
+            return None
+
+    # ──── Единая точка запросов ────
+
+    async def _request(self, eid: str, kind: str, call: Callable[[], Awaitable[Any]],
+                       client: Any = None, limited: bool = False) -> Any:
+        """
+        Запрос с повторами: сетевые ошибки, таймауты и 429 повторяются
+        с экспоненциальной паузой и джиттером в пределах бюджета повторов
+        прохода (RetryPolicy). Пауза — между попытками, слот лимита
+        в это время свободен. Открытый breaker не повторяется.
+        """
+        retry = self._retry_of(eid)
+        attempt = 0
+        while True:
+            try:
+                result = await self._send(eid, kind, call, client, limited)
+            except ccxt.NetworkError:
+                attempt += 1
+                if not retry.take(attempt):
+                    raise
+                await asyncio.sleep(retry.delay(attempt))
+                continue
+            if attempt:
+                retry.recovered += 1
+            return result
+
+    async def _send(self, eid: str, kind: str, call: Callable[[], Awaitable[Any]],
+                    client: Any = None, limited: bool = False) -> Any:
+        """
+        Одна попытка запроса к бирже: вес списывается из бюджета биржи
+        (ждём окно, если он исчерпан), затем — слот AIMD-лимита для
+        одиночных запросов. Перед этим ждём паузу биржи после 429.
+        Расход сверяется с rate-limit заголовками фьючерсных ответов; время
+        декодирования ответа пишется в jsondecode.stats как eid:kind.
+
+        429 / DDoS-защита ставят на паузу все запросы биржи (Retry-After).
+        Breaker класса эндпоинтов открыт — CircuitOpenError без запроса
+        и без списания веса.
+
+        Breaker видит только отправленные запросы: время считается с момента
+        получения слота. Сетевые ошибки, 429 и медленные ответы — провалы;
+        ошибки символа — нет. Отмена по дедлайну до отправки или раньше
+        slow_call исхода не даёт (вес неотправленного запроса возвращается).
+        """
+        breaker = self._health_of(eid).breaker(kind)
+        if breaker.rejects():
+            breaker.rejected += 1
+            raise CircuitOpenError(f"{eid}: breaker {endpoint_class(kind)} открыт")
+        retry = self._retry_of(eid)
+        await retry.wait_pause()
+        budget = self._budgets.get(eid)
+        if budget:
+            await budget.acquire(kind)
+        # Пробу half-open берём после ожиданий: за это время её мог занять
+        # другой запрос, тогда вес возвращается
+        if not breaker.allow():
+            if budget:
+                budget.refund(kind)
+            raise CircuitOpenError(f"{eid}: breaker {endpoint_class(kind)} открыт")
+        limiter = self._limiters.get(eid) if limited else None
+        start = 0.0
+        sent = False
+        cancelled = False
+        failed = True
+        try:
+            with jsondecode.endpoint(f"{eid}:{kind}"):
+                async with limiter.slot() if limiter else contextlib.nullcontext():
+                    start = time.monotonic()
+                    sent = True
+                    result = await call()
+            failed = False
+            return result
+        except asyncio.CancelledError:
+            cancelled = True
+            raise
+        except (ccxt.RateLimitExceeded, ccxt.DDoSProtection):
+            client = client or self.exchanges.get(eid)
+            retry.pause(self._retry_after(getattr(client, "last_response_headers", None)))
+            raise
+        except VENUE_ERRORS as e:
+            # 404 поштучного запроса — ошибка символа: без повторов и breaker'а
+            if kind in ("oi_one", "funding_one") and is_not_found(e):
+                failed = False
+                raise SymbolNotFound(str(e)) from e
+            raise
+        except Exception:
+            failed = False
+            raise
+        finally:
+            latency = time.monotonic() - start if sent else 0.0
+            if not sent or (cancelled and latency <= breaker.slow_call):
+                # Снят дедлайном в очереди на слот или до таймаута — не исход биржи
+                breaker.release()
+                if budget and not sent:
+                    budget.refund(kind)
+            else:
+                breaker.record(failed, latency)
+            client = client or self.exchanges.get(eid)
+            # Заголовки спота (Binance x-mbx-used-weight-1m) описывают отдельный
+            # спот-пул лимитов биржи: сверять с ними фьючерсный бюджет нельзя
+            if budget and not self._is_spot(client):
+                budget.observe(getattr(client, "last_response_headers", None))
+
+    @staticmethod
+    def _is_spot(client: Any) -> bool:
+        options = getattr(client, "options", None) or {}
+        return options.get("defaultType") == "spot"
+
+    @staticmethod
+    def _retry_after(headers: Optional[Dict[str, str]]) -> Optional[float]:
+        """Retry-After из ответа с 429 (секунды), если биржа его прислала"""
+        for key, value in (headers or {}).items():
+            if key.lower() == "retry-after":
+                try:
+                    return min(float(value), config.RECONNECT_MAX_DELAY)
+                except (TypeError, ValueError):
+                    return None
+        return None
+
+    def _retry_of(self, eid: str) -> RetryPolicy:
+        retry = self._retries.get(eid)
+        if retry is None:
+            retry = self._retries[eid] = RetryPolicy(
+                budget=config.RETRY_BUDGET,
+                max_attempts=config.RETRY_MAX_ATTEMPTS,
+                base_delay=config.RETRY_BASE_DELAY,
+                rate_limit_pause=config.RATE_LIMIT_PAUSE,
+            )
+        return retry
+
+    def _health_of(self, eid: str) -> ExchangeHealth:
+        health = self._health.get(eid)
+        if health is None:
+            health = self._health[eid] = ExchangeHealth(
+                window=config.BREAKER_WINDOW,
+                min_calls=config.BREAKER_MIN_CALLS,
+                error_rate=config.BREAKER_ERROR_RATE,
+                slow_call=config.BREAKER_SLOW_CALL,
+                open_for=config.BREAKER_OPEN_SEC,
+                max_open=config.BREAKER_MAX_OPEN_SEC,
+            )
+        return health
+
+    # ──── Снапшот цикла ────
+
+    def begin_snapshot(self, eid: str) -> ExchangeSnapshot:
+        """Начать новый цикл: все bulk-ресурсы биржи будут загружены заново"""
+        old = self._snapshots.get(eid)
+        if old is not None:
+            old.close()
+        snapshot = ExchangeSnapshot(eid)
+        self._snapshots[eid] = snapshot
+        return snapshot
+
+    def _snapshot(self, eid: str) -> ExchangeSnapshot:
+        return self._snapshots.get(eid) or self.begin_snapshot(eid)
+
+    async def _fetch_raw(self, eid: str, endpoint: venues.BulkEndpoint) -> Any:
+        """Сырой ответ нативного bulk-эндпоинта (один раз за цикл)"""
+        exchange = self.exchanges[eid]
+        method = getattr(exchange, endpoint.method)
+        return await self._snapshot(eid).get(
+            endpoint.key,
+            lambda: self._request(eid, endpoint.method, lambda: method(dict(endpoint.params))),
+        )
+
+    async def _prefetch_raw(self, eid: str, endpoint: venues.BulkEndpoint):
+        """Загрузить bulk-ответ в снапшот заранее; ошибку увидит основной этап"""
+        with contextlib.suppress(Exception):
+            await self._fetch_raw(eid, endpoint)
+
     async def _fetch_all_tickers(self, eid: str) -> Dict[str, float]:
         """Batch: все фьючерсные тикеры → {symbol: last_price}"""
+        return await self._snapshot(eid).get("tickers", lambda: self._load_tickers(eid))
+
+    def _stream_values(self, eid: str, name: str) -> Optional[Dict[str, float]]:
+        """
+        Поле из свежей таблицы WS-стрима → {symbol: value}.
+        None — стрима нет, он устарел или поле ещё не дозаполнено
+        после подключения (нужен REST).
+        """
+        stream = self.streams.get(eid)
+        if not stream or not stream.is_fresh(config.STREAM_MAX_AGE) or not stream.is_complete(name):
+            return None
+        table = stream.table
+        out = {}
+        for pair in self._futures_symbols_cache.get(eid, []):
+            value = table.get(pair["id"], {}).get(name)
+            if value is not None:
+                out[pair["symbol"]] = value
+        return out
+
+    async def _load_tickers(self, eid: str) -> Dict[str, float]:
         exchange = self.exchanges.get(eid)
         if not exchange:
             return {}
 
+        streamed = self._stream_values(eid, "price")
+        if streamed:
+            return streamed
+
+        prices = await self._poll_tickers(eid)
+        self._seed_stream(eid, "price", prices)
+        return prices
+
+    def _seed_stream(self, eid: str, name: str, values: Dict[str, float]):
+        """REST-снапшот → символы, которых стрим ещё не прислал"""
+        stream = self.streams.get(eid)
+        if not stream or not values or stream.is_complete(name):
+            return
+        stream.seed(name, {
+            pair["id"]: values[pair["symbol"]]
+            for pair in self._futures_symbols_cache.get(eid, [])
+            if pair["symbol"] in values
+        })
+
+    async def _poll_tickers(self, eid: str) -> Dict[str, float]:
+        """Тикеры через REST: нативный bulk-ответ или fetch_tickers"""
+        exchange = self.exchanges[eid]
+        fast = await self._fetch_raw_field(eid, "price")
+        if fast:
+            return {symbol: price for symbol, price in fast.items() if price > 0}
+
         try:
-            raw = await exchange.fetch_tickers()
+            raw = await self._request(eid, "tickers", exchange.fetch_tickers)
             result = {}
             for symbol, ticker in raw.items():
                 last = ticker.get("last")
@@ -221,145 +987,368 @@ class ExchangeManager:
             logger.warning(f"fetch_tickers {eid}: {e}")
             return {}
 
-    async def _fetch_all_funding_rates(self, eid: str) -> Dict[str, float]:
+    async def _fetch_raw_field(self, eid: str, name: str) -> Dict[str, float]:
+        """
+        Быстрый путь: поле прямо из сырого ответа нативного эндпоинта,
+        без унифицированного парсинга ccxt (словарь на десятки полей на символ).
+        Пусто — эндпоинта нет, быстрый путь выключен или запрос не удался:
+        тогда работает унифицированный путь ccxt.
+        """
+        if not config.RAW_ENDPOINTS or not venues.find_endpoint(eid, name):
+            return {}
+        try:
+            return await self._fetch_bulk_field(eid, name)
+        except Exception as e:
+            logger.warning(f"raw {name} {eid}: {e} — фоллбэк на ccxt")
+            return {}
+
+    async def _fetch_all_funding_rates(self, eid: str, target_bases: Optional[set] = None) -> Dict[str, float]:
         """Batch: все funding rates → {symbol: rate%}"""
+        return await self._snapshot(eid).get("funding", lambda: self._load_funding_rates(eid, target_bases))
+
+    async def _load_funding_rates(self, eid: str, target_bases: Optional[set] = None) -> Dict[str, float]:
+        """
+        Фандинг с учётом расписания выплат (FundingCache): таблица
+        перечитывается, только если у целевых символов близка или прошла
+        выплата либо значения старше FUNDING_MAX_STALENESS. Если фандинг
+        лежит в ответе, который проход грузит и так, — читается всегда.
+        """
         exchange = self.exchanges.get(eid)
         if not exchange:
             return {}
 
+        streamed = self._stream_values(eid, "funding")
+        if streamed:
+            return {symbol: rate * 100 for symbol, rate in streamed.items()}
+
+        cache = self._funding_of(eid)
+        now = time.time()
+        # Символы, которых таблица биржи не содержит, не повод её перечитывать
+        targets = [
+            p["symbol"] for p in self._target_pairs(eid, target_bases)
+            if not self._negative.is_blocked(eid, p["symbol"], "funding", now, count=False)
+        ]
+        if not self._funding_shared(eid) and not cache.table_due(targets, now):
+            cache.skipped += 1
+            return cache.rates()
+
+        fast = await self._fetch_raw_field(eid, "funding")
+        if fast:
+            next_times = await self._fetch_raw_field(eid, "next_funding")
+            intervals = await self._fetch_raw_field(eid, "funding_interval_h")
+            for symbol, rate in fast.items():
+                hours = intervals.get(symbol)
+                cache.store(
+                    symbol, rate * 100, now,
+                    next_funding=next_times.get(symbol, 0.0) / 1000,
+                    interval=hours * 3600 if hours else None,
+                )
+            cache.table_at = now
+            cache.refreshed += 1
+            self._mark_funding_table(eid, targets, fast, now)
+            return {symbol: rate * 100 for symbol, rate in fast.items()}
+
         try:
             if hasattr(exchange, "fetch_funding_rates"):
-                raw = await exchange.fetch_funding_rates()
+                raw = await self._request(eid, "funding", exchange.fetch_funding_rates)
                 result = {}
                 for symbol, fr in raw.items():
                     rate = fr.get("fundingRate")
                     if rate is not None:
                         result[symbol] = float(rate) * 100  # → проценты
+                        next_funding, interval = self._funding_schedule(fr)
+                        cache.store(symbol, result[symbol], now, next_funding, interval)
+                cache.table_at = now
+                cache.refreshed += 1
+                self._mark_funding_table(eid, targets, result, now)
                 return result
 
             # Фоллбэк: одиночные запросы с семафором
-            return await self._fetch_funding_rates_individually(eid)
+            return await self._fetch_funding_rates_individually(eid, target_bases)
 
         except Exception as e:
             logger.warning(f"fetch_funding_rates {eid}: {e}")
-            return await self._fetch_funding_rates_individually(eid)
+            return await self._fetch_funding_rates_individually(eid, target_bases)
+
+    def _mark_funding_table(self, eid: str, targets: List[str], table: Dict, now: float):
+        """Целевые символы, которых нет в таблице фандинга, — в негативный кэш"""
+        negative = self._negative
+        for symbol in targets:
+            if symbol in table:
+                negative.mark_good(eid, symbol, "funding")
+            else:
+                negative.mark_bad(eid, symbol, "funding", "missing", now)
+
+    @staticmethod
+    def _funding_shared(eid: str) -> bool:
+        """Фандинг приходит в ответе, который проход грузит всё равно (тикеры/индекс)"""
+        endpoint = venues.find_endpoint(eid, "funding")
+        if not config.RAW_ENDPOINTS or endpoint is None:
+            return False
+        shared = [venues.find_endpoint(eid, "price")]
+        if config.SPREAD_SOURCE == "index":
+            shared.append(venues.find_endpoint(eid, "index"))
+        return endpoint in shared
 
-    async def _fetch_funding_rates_individually(self, eid: str) -> Dict[str, float]:
-        """Фоллбэк: funding rates по одному (с семафором)"""
+    def _funding_of(self, eid: str) -> FundingCache:
+        cache = self._funding_cache.get(eid)
+        if cache is None:
+            cache = self._funding_cache[eid] = FundingCache(
+                max_staleness=config.FUNDING_MAX_STALENESS,
+                near_window=config.FUNDING_NEAR_WINDOW,
+            )
+        return cache
+
+    def _target_pairs(self, eid: str, target_bases: Optional[set]) -> List[Dict]:
+        pairs = self._futures_symbols_cache.get(eid, [])
+        if target_bases:
+            return [p for p in pairs if p["base"] in target_bases]
+        return pairs
+
+    @staticmethod
+    def _funding_schedule(fr: Dict) -> Tuple[Optional[float], Optional[float]]:
+        """(ближайшая выплата, интервал) из структуры фандинга ccxt, сек"""
+        now_ms = time.time() * 1000
+        times = [
+            float(t) for t in (fr.get("fundingTimestamp"), fr.get("nextFundingTimestamp"))
+            if t and float(t) > now_ms
+        ]
+        interval = fr.get("interval")  # "8h"
+        hours = venues.to_float(interval[:-1]) if isinstance(interval, str) and interval.endswith("h") else None
+        return (min(times) / 1000 if times else None), (hours * 3600 if hours else None)
+
+    async def _fetch_funding_rates_individually(self, eid: str,
+                                                target_bases: Optional[set] = None) -> Dict[str, float]:
+        """
+        Фоллбэк: funding rates по одному (с адаптивным лимитом).
+
+        Только по монетам из target_bases (проходят MCap) и только тем,
+        кому пора по расписанию выплат (FundingCache). За проход — не больше
+        FUNDING_FALLBACK_BUDGET запросов: сначала ни разу не полученные
+        символы, затем самые давние. Результаты сохраняются между
+        проходами, так что весь набор обходится за ⌈N / бюджет⌉ проходов,
+        а остальным отдаётся последнее значение.
+        """
         exchange = self.exchanges.get(eid)
         if not exchange or not hasattr(exchange, "fetch_funding_rate"):
             return {}
 
-        pairs = self._futures_symbols_cache.get(eid, [])
-        sem = self._semaphores.get(eid, asyncio.Semaphore(3))
+        symbols = [p["symbol"] for p in self._target_pairs(eid, target_bases)]
+        cache = self._funding_of(eid)
+        negative = self._negative
+        now = time.time()
+        due = [
+            symbol for symbol in cache.due(symbols, now)
+            if not negative.is_blocked(eid, symbol, "funding_one", now)
+        ]
+        if config.FUNDING_FALLBACK_BUDGET > 0:
+            due = due[:config.FUNDING_FALLBACK_BUDGET]
+        cache.skipped += len(symbols) - len(due)
 
-        async def fetch_one(symbol: str) -> Tuple[str, Optional[float]]:
-            async with sem:
-                try:
-                    fr = await exchange.fetch_funding_rate(symbol)
-                    rate = fr.get("fundingRate")
-                    if rate is not None:
-                        return (symbol, float(rate) * 100)
-                except Exception:
-                    pass
-                return (symbol, None)
+        async def fetch_one(symbol: str):
+            try:
+                fr = await self._request(
+                    eid, "funding_one", lambda: exchange.fetch_funding_rate(symbol), limited=True,
+                )
+                rate = fr.get("fundingRate")
+                if rate is not None:
+                    negative.mark_good(eid, symbol, "funding_one")
+                    # Сразу в кэш: при отмене по дедлайну полученное не теряется
+                    next_funding, interval = self._funding_schedule(fr)
+                    cache.store(symbol, float(rate) * 100, time.time(), next_funding, interval)
+                    cache.refreshed += 1
+                    return
+                negative.mark_bad(eid, symbol, "funding_one", "empty", time.time())
+            except SYMBOL_ERRORS as e:
+                negative.mark_bad(eid, symbol, "funding_one", type(e).__name__, time.time())
+            except Exception:
+                pass
 
-        tasks = [fetch_one(p["symbol"]) for p in pairs[:100]]  # Лимит
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        await asyncio.gather(*[fetch_one(symbol) for symbol in due], return_exceptions=True)
 
-        out = {}
-        for r in results:
-            if isinstance(r, tuple) and r[1] is not None:
-                out[r[0]] = r[1]
-        return out
+        rates = cache.rates(symbols)
+        logger.debug(f"Фандинг {eid} поштучно: {len(due)} запросов, покрыто {len(rates)}/{len(symbols)}")
+        return rates
+
+    async def _fetch_oi_scheduled(self, eid: str, rows: List[Dict],
+                                  deadline: float = float("inf")) -> Dict[str, float]:
+        """
+        OI для кандидатов. Bulk-биржи — всё одним запросом; на биржах
+        с поштучным OI запросы идут по hot/cold расписанию _oi_cache
+        в пределах бюджета цикла, остальным — последнее значение.
+        К дедлайну этапа "oi" отдаются уже полученные символы.
+        Returns: {symbol: OI в базовом активе}
+        """
+        if venues.find_endpoint(eid, "oi"):
+            fresh: Dict[str, float] = {}
+            await self._stage(eid, "oi", self._fetch_oi_batch(eid, [r["_pair"] for r in rows], fresh), deadline)
+            return fresh
+
+        cache = self._oi_cache.get(eid)
+        if cache is None:
+            cache = self._oi_cache[eid] = OICache(
+                cold_every=config.OI_COLD_EVERY,
+                budget=config.OI_REQUEST_BUDGET,
+                hot_band=config.OI_HOT_BAND,
+            )
+
+        to_fetch, oi_data = cache.plan(rows)
+        fresh = {}
+        await self._stage(eid, "oi", self._fetch_oi_batch(eid, [r["_pair"] for r in to_fetch], fresh), deadline)
+        cache.store(fresh, time.time())
+
+        # Не ответили — отдаём прошлое значение, если оно было
+        for row in to_fetch:
+            entry = cache.entries.get(row["symbol"])
+            if row["symbol"] not in fresh and entry is not None:
+                oi_data[row["symbol"]] = entry.amount
+        oi_data.update(fresh)
+        return oi_data
 
-    async def _fetch_oi_batch(self, eid: str, pairs: List[Dict]) -> Dict[str, float]:
+    async def _fetch_oi_batch(self, eid: str, pairs: List[Dict],
+                              out: Optional[Dict[str, float]] = None) -> Dict[str, float]:
         """
-        OI: batch или параллельные одиночные запросы с семафором.
-        Returns: {symbol: oi_in_usd}
+        OI: batch или параллельные одиночные запросы с адаптивным лимитом.
+        Результаты пишутся в out по мере прихода: при отмене по дедлайну
+        уже полученные символы остаются у вызывающего.
+        Returns: {symbol: OI в базовом активе}
         """
+        out = {} if out is None else out
         exchange = self.exchanges.get(eid)
         if not exchange:
-            return {}
+            return out
+
+        # Bulk: один нативный запрос на всю биржу
+        if venues.find_endpoint(eid, "oi"):
+            try:
+                out.update(await self._fetch_oi_bulk(eid, pairs))
+                return out
+            except Exception as e:
+                logger.warning(f"bulk OI {eid}: {e} — фоллбэк на одиночные запросы")
+
+        # Фоллбэк: по одному символу (Binance, BingX)
+        if not hasattr(exchange, "fetch_open_interest"):
+            return out
 
-        # Пробуем batch fetch_open_interest для всех пар
-        # Большинство бирж поддерживают только по одному
-        sem = self._semaphores.get(eid, asyncio.Semaphore(self.OI_CONCURRENCY))
-        tickers = await self._fetch_all_tickers(eid)  # Уже кэшировано в вызывающем коде
+        tickers = await self._fetch_all_tickers(eid)  # Из снапшота цикла
+        negative = self._negative
+        now = time.time()
+        pairs = [p for p in pairs if not negative.is_blocked(eid, p["symbol"], "oi_one", now)]
 
-        async def fetch_one(pair: Dict) -> Tuple[str, Optional[float]]:
+        async def fetch_one(pair: Dict):
             symbol = pair["symbol"]
-            async with sem:
-                try:
-                    if hasattr(exchange, "fetch_open_interest"):
-                        oi_data = await exchange.fetch_open_interest(symbol)
-                        if oi_data:
-                            # Предпочитаем openInterestValue (USD)
-                            oi_val = oi_data.get("openInterestValue")
-                            if oi_val and float(oi_val) > 0:
-                                return (symbol, float(oi_val))
-
-                            # Фоллбэк: amount * price
-                            oi_amount = oi_data.get("openInterestAmount")
-                            if oi_amount:
-                                price = tickers.get(symbol, 0)
-                                if price > 0:
-                                    return (symbol, float(oi_amount) * price)
-
-                except ccxt.NotSupported:
-                    pass
-                except ccxt.RateLimitExceeded:
-                    await asyncio.sleep(2)
-                except Exception:
-                    pass
-                return (symbol, None)
-
-        tasks = [fetch_one(p) for p in pairs]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+            try:
+                oi_data = await self._request(
+                    eid, "oi_one", lambda: exchange.fetch_open_interest(symbol), limited=True,
+                )
+                oi_val = oi_data.get("openInterestValue") if oi_data else None
+                oi_amount = oi_data.get("openInterestAmount") if oi_data else None
+                if not oi_val and not oi_amount:
+                    negative.mark_bad(eid, symbol, "oi_one", "empty", time.time())
+                    return
+                negative.mark_good(eid, symbol, "oi_one")
+
+                # Предпочитаем openInterestAmount (контракты → базовый актив)
+                if oi_amount and float(oi_amount) > 0:
+                    out[symbol] = float(oi_amount) * pair["contract_size"]
+                    return
+
+                # Фоллбэк: value (USD) / price
+                if oi_val:
+                    price = tickers.get(symbol, 0)
+                    if price > 0:
+                        out[symbol] = float(oi_val) / price
+
+            except SYMBOL_ERRORS as e:
+                negative.mark_bad(eid, symbol, "oi_one", type(e).__name__, time.time())
+            except Exception:
+                # Исчерпанные повторы, открытый breaker — не вина символа
+                pass
+
+        await asyncio.gather(*[fetch_one(p) for p in pairs], return_exceptions=True)
+        return out
+
+    async def _fetch_bulk_field(self, eid: str, name: str,
+                                pairs: Optional[List[Dict]] = None) -> Dict[str, float]:
+        """
+        Одно поле по всем контрактам из нативного bulk-ответа.
+        Контракты пересчитываются в базовый актив.
+        Returns: {symbol: value}
+        """
+        endpoint = venues.find_endpoint(eid, name)
+        raw = await self._fetch_raw(eid, endpoint)
+        values = venues.extract_field(endpoint, raw, name)
+        in_contracts = name in endpoint.contracts
 
         out = {}
-        for r in results:
-            if isinstance(r, tuple) and r[1] is not None:
-                out[r[0]] = r[1]
+        for pair in pairs if pairs is not None else self._futures_symbols_cache.get(eid, []):
+            value = values.get(pair["id"])
+            if value is None:
+                continue
+            out[pair["symbol"]] = value * pair["contract_size"] if in_contracts else value
         return out
 
+    async def _fetch_oi_bulk(self, eid: str, pairs: List[Dict]) -> Dict[str, float]:
+        """
+        OI всех контрактов одним нативным запросом (тикеры/open-interest биржи).
+        Returns: {symbol: OI в базовом активе}
+        """
+        amounts = await self._fetch_bulk_field(eid, "oi", pairs)
+        return {symbol: amount for symbol, amount in amounts.items() if amount > 0}
+
+    async def _fetch_index_prices(self, eid: str) -> Dict[str, float]:
+        """
+        Индексные цены перпов (спот-композит биржи) из bulk-ответа.
+        Returns: {symbol: index_price}, пусто если биржа их не отдаёт
+        """
+        streamed = self._stream_values(eid, "index")
+        if streamed:
+            return {symbol: p for symbol, p in streamed.items() if p > 0}
+        if not venues.find_endpoint(eid, "index"):
+            return {}
+        try:
+            prices = await self._fetch_bulk_field(eid, "index")
+            return {symbol: p for symbol, p in prices.items() if p > 0}
+        except Exception as e:
+            logger.warning(f"index prices {eid}: {e}")
+            return {}
+
     async def _fetch_spot_prices(self, eid: str, target_bases: set) -> Dict[str, float]:
         """
         Получить спотовые цены для целевых монет.
-        Пробуем переключиться на спот и сделать batch.
+        Batch через долгоживущий спот-клиент, один раз за цикл.
         Returns: {BASE: price}
         """
         exchange = self.exchanges.get(eid)
         if not exchange or not target_bases:
             return {}
 
-        try:
-            # Попробуем создать спотовый инстанс
-            eid_class = getattr(ccxt, eid, None)
-            if not eid_class:
-                return {}
+        prices = await self._fetch_spot_table(eid)
+        return {base: prices[base] for base in target_bases if base in prices}
 
-            spot_exchange = eid_class({
-                "enableRateLimit": True,
-                "timeout": 10000,
-                "options": {"defaultType": "spot"},
-            })
+    async def _fetch_spot_table(self, eid: str) -> Dict[str, float]:
+        """Все спотовые цены биржи из снапшота цикла → {BASE: price}"""
+        return await self._snapshot(eid).get("spot", lambda: self._load_spot_prices(eid))
 
-            try:
-                raw = await spot_exchange.fetch_tickers()
-                result = {}
-                for symbol, ticker in raw.items():
-                    # Ищем BASE/USDT
-                    parts = symbol.split("/")
-                    if len(parts) >= 2 and parts[1] == "USDT" and ":" not in symbol:
-                        base = parts[0]
-                        if base in target_bases:
-                            last = ticker.get("last")
-                            if last and float(last) > 0:
-                                result[base] = float(last)
-                return result
-            finally:
-                await spot_exchange.close()
+    async def _load_spot_prices(self, eid: str) -> Dict[str, float]:
+        """Все спотовые USDT-цены биржи → {BASE: price}"""
+        spot_exchange = self.spot_exchanges.get(eid)
+        if not spot_exchange:
+            return {}
+
+        try:
+            raw = await self._request(
+                eid, "spot_tickers", spot_exchange.fetch_tickers, client=spot_exchange,
+            )
+            result = {}
+            for symbol, ticker in raw.items():
+                # Ищем BASE/USDT
+                parts = symbol.split("/")
+                if len(parts) >= 2 and parts[1] == "USDT" and ":" not in symbol:
+                    last = ticker.get("last")
+                    if last and float(last) > 0:
+                        result[parts[0]] = float(last)
+            return result
 
         except Exception as e:
             logger.debug(f"Спот-цены {eid}: {e}")
@@ -375,10 +1364,80 @@ class ExchangeManager:
     def get_connected_exchanges(self) -> List[str]:
         return list(self.exchanges.keys())
 
+    def _budget_str(self, eid: str) -> str:
+        b = self._budgets[eid].get_stats()
+        return f"{b['used']}/{b['capacity']} за {b['window']:g}с"
+
+    def get_concurrency(self) -> Dict[str, Dict]:
+        """Текущие AIMD-лимиты и их счётчики по биржам"""
+        return {eid: limiter.get_stats() for eid, limiter in self._limiters.items()}
+
+    def get_budgets(self) -> Dict[str, Dict]:
+        """Расход бюджетов веса запросов по биржам"""
+        return {eid: budget.get_stats() for eid, budget in self._budgets.items()}
+
+    def get_weight_spent(self, eid: str) -> float:
+        """Сколько веса запросов биржа израсходовала с запуска"""
+        budget = self._budgets.get(eid)
+        return budget.spent if budget else 0.0
+
+    def suggest_interval(self, eid: str, elapsed: float, weight: float) -> float:
+        """
+        Пауза между проходами биржи: не чаще, чем бюджет восстанавливает
+        потраченный за проход вес, и не меньше 2× длительности прохода;
+        в пределах [SCAN_INTERVAL_MIN, SCAN_INTERVAL].
+        """
+        budget = self._budgets.get(eid)
+        refill = weight * budget.spec.window / budget.limit if budget and budget.limit else 0.0
+        interval = min(config.SCAN_INTERVAL, max(config.SCAN_INTERVAL_MIN, elapsed * 2, refill))
+        # Деградирующая биржа опрашивается реже (до 4×)
+        return interval / max(0.25, self.get_health_score(eid))
+
+    def get_health_score(self, eid: str) -> float:
+        """Здоровье биржи 0..1 по её circuit breaker'ам"""
+        health = self._health.get(eid)
+        return health.score if health else 1.0
+
+    def blocked_for(self, eid: str) -> Optional[float]:
+        """Секунд до пробного запроса, если bulk-breaker биржи открыт; иначе None"""
+        health = self._health.get(eid)
+        return health.blocked_for() if health else None
+
+    def get_health(self) -> Dict[str, Dict]:
+        """Оценка здоровья и состояния breaker'ов по биржам"""
+        return {eid: health.get_stats() for eid, health in self._health.items()}
+
+    def get_missed_deadlines(self) -> Dict[str, Dict[str, int]]:
+        """Промахи дедлайнов: eid → {этап: сколько раз}"""
+        return {eid: dict(stages) for eid, stages in self._missed_deadlines.items()}
+
+    def get_stage_timings(self) -> Dict[str, str]:
+        """Тайминги этапов и критический путь последнего прохода по биржам"""
+        return dict(self._stage_timings)
+
+    def get_missing(self, eid: str) -> List[str]:
+        """Символы, прошедшие фильтры, но оставшиеся без OI к дедлайну (последний цикл)"""
+        return list(self._missing.get(eid, []))
+
+    def get_reconnect_events(self) -> List[Tuple[float, str, str]]:
+        """Последние события переподключений: (ts, eid, событие)"""
+        return list(self._reconnect_events)
+
     def get_status(self) -> Dict:
         return {
             "connected": list(self.exchanges.keys()),
             "failed": self._init_errors,
             "total_connected": len(self.exchanges),
             "total_failed": len(self._init_errors),
+            "concurrency": self.get_concurrency(),
+            "budgets": self.get_budgets(),
+            "market_diffs": self._market_diffs,
+            "reconnects": self.get_reconnect_events(),
+            "retry_at": dict(self._retry_at),
+            "missed_deadlines": self.get_missed_deadlines(),
+            "health": self.get_health(),
+            "negative": self._negative.get_stats(),
+            "funding_cache": {eid: cache.get_stats() for eid, cache in self._funding_cache.items()},
+            "retries": {eid: retry.get_stats() for eid, retry in self._retries.items()},
+            "http": self.transport.get_stats() if self.transport is not None else {},
         }
@@ -0,0 +1,189 @@
+"""
+health.py — Circuit breaker и оценка здоровья бирж
+Деградирующую биржу перестаём долбить, планировщик её притормаживает
+"""
+import time
+from collections import deque
+from typing import Dict, Optional
+
+import ccxt.async_support as ccxt
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Ошибки, которые говорят о состоянии биржи (а не о конкретном символе)
+VENUE_ERRORS = (ccxt.NetworkError, ccxt.ExchangeNotAvailable)
+# Ошибки конкретного символа: эндпоинт его не поддерживает или не знает
+# (404 поштучного запроса приходит как SymbolNotFound, см. is_not_found)
+SYMBOL_ERRORS = (ccxt.NotSupported, ccxt.BadSymbol, ccxt.BadRequest)
+
+
+class CircuitOpenError(Exception):
+    """Запрос не отправлен: breaker класса эндпоинтов биржи открыт"""
+
+
+class SymbolNotFound(ccxt.BadSymbol):
+    """404 на поштучный запрос: биржа не знает символ на этом эндпоинте"""
+
+
+def is_not_found(error: Exception) -> bool:
+    """
+    HTTP 404 от ccxt. httpExceptions сводит его к ExchangeNotAvailable
+    (NetworkError) — без разбора он бы повторялся и ронял breaker биржи.
+    Код есть только в тексте: "<id> <method> <url> 404 <reason> <body>".
+    """
+    return isinstance(error, ccxt.ExchangeNotAvailable) and " 404 " in str(error)
+
+
+def endpoint_class(kind: str) -> str:
+    """Класс эндпоинта по типу запроса (см. ExchangeManager._request)"""
+    if kind in ("oi_one", "funding_one", "markets"):
+        return kind
+    return "bulk"
+
+
+class CircuitBreaker:
+    """
+    Breaker одного класса эндпоинтов биржи.
+
+    - closed: запросы идут; доля ошибок (и медленных ответов > slow_call)
+      в окне последних window запросов ≥ error_rate → open
+    - open: запросы не отправляются open_for секунд
+    - half_open: проходит один пробный запрос; успех → closed,
+      ошибка → снова open на вдвое большее время (до max_open)
+    """
+
+    def __init__(self, window: int = 20, min_calls: int = 5, error_rate: float = 0.5,
+                 slow_call: float = 8.0, open_for: float = 30.0, max_open: float = 300.0):
+        self.min_calls = min_calls
+        self.error_rate = error_rate
+        self.slow_call = slow_call
+        self.base_open = open_for
+        self.max_open = max_open
+        self.open_for = open_for
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.trips = 0
+        self.rejected = 0
+        self._outcomes: deque = deque(maxlen=window)  # True = ошибка/медленно
+        self._probing = False
+
+    def allow(self) -> bool:
+        if self.state == OPEN:
+            if time.monotonic() - self.opened_at < self.open_for:
+                self.rejected += 1
+                return False
+            self.state = HALF_OPEN
+            self._probing = False
+        if self.state == HALF_OPEN:
+            if self._probing:
+                self.rejected += 1
+                return False
+            self._probing = True
+        return True
+
+    def rejects(self) -> bool:
+        """Отклонит ли allow() запрос — без захвата пробы half-open"""
+        if self.state == OPEN:
+            return time.monotonic() - self.opened_at < self.open_for
+        return self.state == HALF_OPEN and self._probing
+
+    def release(self):
+        """Пропущенный запрос не дошёл до биржи: вернуть пробу, исхода нет"""
+        if self.state == HALF_OPEN:
+            self._probing = False
+
+    def record(self, failed: bool, latency: float = 0.0):
+        failed = failed or latency > self.slow_call
+        if self.state == HALF_OPEN:
+            self._probing = False
+            if failed:
+                self._trip(self.open_for * 2)
+            else:
+                self.state = CLOSED
+                self.open_for = self.base_open
+                self._outcomes.clear()
+            return
+        self._outcomes.append(failed)
+        if (
+            self.state == CLOSED
+            and len(self._outcomes) >= self.min_calls
+            and self.failure_rate >= self.error_rate
+        ):
+            self._trip(self.open_for)
+
+    def _trip(self, open_for: float):
+        self.state = OPEN
+        self.open_for = min(self.max_open, open_for)
+        self.opened_at = time.monotonic()
+        self.trips += 1
+        self._outcomes.clear()
+
+    @property
+    def failure_rate(self) -> float:
+        if not self._outcomes:
+            return 0.0
+        return sum(self._outcomes) / len(self._outcomes)
+
+    def retry_in(self) -> float:
+        """Через сколько секунд open-breaker пропустит пробный запрос"""
+        if self.state != OPEN:
+            return 0.0
+        return max(0.0, self.opened_at + self.open_for - time.monotonic())
+
+    def health(self) -> float:
+        if self.state == OPEN:
+            return 0.0
+        if self.state == HALF_OPEN:
+            return 0.5
+        return 1.0 - self.failure_rate
+
+    def get_stats(self) -> dict:
+        return {
+            "state": self.state,
+            "failure_rate": round(self.failure_rate, 2),
+            "trips": self.trips,
+            "rejected": self.rejected,
+            "retry_in": round(self.retry_in(), 1),
+        }
+
+
+class ExchangeHealth:
+    """Breaker'ы одной биржи по классам эндпоинтов и общая оценка здоровья"""
+
+    def __init__(self, **breaker_params):
+        self._params = breaker_params
+        self.breakers: Dict[str, CircuitBreaker] = {}
+
+    def breaker(self, kind: str) -> CircuitBreaker:
+        cls = endpoint_class(kind)
+        breaker = self.breakers.get(cls)
+        if breaker is None:
+            breaker = self.breakers[cls] = CircuitBreaker(**self._params)
+        return breaker
+
+    @property
+    def score(self) -> float:
+        """
+        0..1: произведение здоровья классов. Bulk-запросы (тикеры, фандинг)
+        обязательны для прохода — open bulk-breaker даёт 0.
+        """
+        score = 1.0
+        for cls, breaker in self.breakers.items():
+            health = breaker.health()
+            score *= health if cls == "bulk" else 0.5 + 0.5 * health
+        return round(score, 2)
+
+    def blocked_for(self) -> Optional[float]:
+        """Секунд до пробного bulk-запроса, если bulk-breaker открыт; иначе None"""
+        breaker = self.breakers.get("bulk")
+        if breaker is None or breaker.state != OPEN:
+            return None
+        return breaker.retry_in()
+
+    def get_stats(self) -> dict:
+        return {
+            "score": self.score,
+            "breakers": {cls: b.get_stats() for cls, b in self.breakers.items()},
+        }
@@ -0,0 +1,73 @@
+"""
+jsondecode.py — Быстрый JSON-декодер для ответов бирж и CoinGecko
+orjson, если установлен; иначе stdlib json. Время декодирования — по эндпоинтам
+"""
+import json
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import orjson
+    _loads = orjson.loads
+    DECODER = "orjson"
+except ImportError:
+    _loads = json.loads
+    DECODER = "json"
+
+# Эндпоинт текущего запроса: ccxt зовёт on_json_response(body) без контекста,
+# поэтому имя проставляет вызывающий код (ExchangeManager._request)
+_endpoint: ContextVar[str] = ContextVar("json_endpoint", default="other")
+
+
+class DecodeStats:
+    """Время и объём декодирования по эндпоинтам за цикл"""
+
+    def __init__(self):
+        self.by_endpoint: Dict[str, List[float]] = {}  # имя → [вызовов, сек, байт]
+
+    def record(self, name: str, seconds: float, size: int):
+        entry = self.by_endpoint.get(name)
+        if entry is None:
+            entry = self.by_endpoint[name] = [0, 0.0, 0]
+        entry[0] += 1
+        entry[1] += seconds
+        entry[2] += size
+
+    def top(self, n: int = 5) -> List[Tuple[str, int, float, int]]:
+        """Самые дорогие эндпоинты: (имя, вызовов, мс, байт)"""
+        items = sorted(self.by_endpoint.items(), key=lambda kv: kv[1][1], reverse=True)
+        return [(name, int(c), s * 1000, int(b)) for name, (c, s, b) in items[:n]]
+
+    def total_ms(self) -> float:
+        return sum(entry[1] for entry in self.by_endpoint.values()) * 1000
+
+    def reset(self):
+        self.by_endpoint = {}
+
+
+stats = DecodeStats()
+
+
+@contextmanager
+def endpoint(name: str):
+    """Приписать декодирование ответов внутри блока эндпоинту name"""
+    token = _endpoint.set(name)
+    try:
+        yield
+    finally:
+        _endpoint.reset(token)
+
+
+def loads(data: Any, name: Optional[str] = None) -> Any:
+    """
+    Декодировать JSON (str или bytes). Подходит как on_json_response
+    для ccxt и как loads= для aiohttp resp.json().
+    name — эндпоинт для статистики (по умолчанию из endpoint()).
+    """
+    start = time.perf_counter()
+    try:
+        return _loads(data)
+    finally:
+        stats.record(name or _endpoint.get(), time.perf_counter() - start, len(data))
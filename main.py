@@ -5,15 +5,19 @@ OI Scanner Bot — Таблетка от бедности 💊
 Запуск: python main.py
 """
 import asyncio
+import functools
 import logging
 import sys
 import time
+from typing import Dict
 
 import config
+import jsondecode
 from exchanges import ExchangeManager
 from marketcap import MarketCapProvider
 from scanner import StrategyScanner
 from telegram_bot import TelegramNotifier
+from transport import SharedTransport
 
 # ═══════════════ Logging ═══════════════
 logging.basicConfig(
@@ -33,10 +37,18 @@ class OIScannerBot:
         for eid in config.EXCHANGES:
             exchange_ids.append("gateio" if eid == "gate" else eid)
 
-        self.exchange_mgr = ExchangeManager(exchange_ids)
+        # Один пул соединений на все биржи и CoinGecko
+        self.transport = SharedTransport(
+            limit=config.HTTP_POOL_LIMIT,
+            limit_per_host=config.HTTP_POOL_PER_HOST,
+            dns_ttl=config.HTTP_DNS_TTL,
+            keepalive=config.HTTP_KEEPALIVE,
+        )
+        self.exchange_mgr = ExchangeManager(exchange_ids, transport=self.transport)
         self.mcap_provider = MarketCapProvider(
             api_key=config.COINGECKO_API_KEY,
             cache_ttl=config.MCAP_CACHE_TTL,
+            transport=self.transport,
         )
         self.scanner = StrategyScanner()
         self.telegram = TelegramNotifier(
@@ -45,8 +57,19 @@ class OIScannerBot:
             topic_id=config.TELEGRAM_TOPIC_ID,
         )
         self._running = False
-        self._cycle = 0
         self._total_signals = 0
+        self._boot_time = time.time()
+        self._first_cycle_logged = False
+        self._first_signal_logged = False
+        self._mcap_task: asyncio.Task = None
+        self._prewarm_task: asyncio.Task = None
+        # Независимые циклы бирж и общая очередь сигналов
+        self._loops: Dict[str, asyncio.Task] = {}
+        self._cycles: Dict[str, int] = {}      # eid → номер прохода
+        self._cadence: Dict[str, float] = {}   # eid → текущая пауза, сек
+        self._signals: asyncio.Queue = asyncio.Queue()
+        self._reports = 0
+        self._last_report = time.time()
 
     async def start(self):
         logger.info("═" * 52)
@@ -57,26 +80,34 @@ class OIScannerBot:
             logger.error("❌ TELEGRAM_BOT_TOKEN или TELEGRAM_CHAT_ID не задан!")
             return
 
-        # 1. Биржи
+        # 1. Прогрессивный старт: биржи, маркеткапы и Telegram — параллельно.
+        # Каждая биржа входит в ротацию сразу после загрузки своих рынков.
         logger.info("📡 Подключение к биржам...")
-        await self.exchange_mgr.initialize()
+        self.transport.open()
+        self.exchange_mgr.start_initialize()
+        # Первая загрузка маркеткапов продолжается в фоне и после старта сканирования
+        self._mcap_task = mcap_task = asyncio.create_task(self.mcap_provider.refresh_cache())
+        telegram_task = asyncio.create_task(self.telegram.initialize())
 
-        connected = self.exchange_mgr.get_connected_exchanges()
-        if not connected:
+        if not await self.exchange_mgr.wait_first_connected():
             logger.error("❌ Ни одна биржа не подключена!")
+            mcap_task.cancel()
+            await asyncio.gather(mcap_task, telegram_task, return_exceptions=True)
             return
 
-        total_pairs = sum(len(self.exchange_mgr.get_futures_symbols(e)) for e in connected)
-
-        # 2. Маркеткапы
+        # 2. Маркеткапы: достаточно частичной таблицы с подходящими монетами
         logger.info("💎 Загрузка маркеткапов...")
-        await self.mcap_provider.refresh_cache()
+        usable_task = asyncio.create_task(self.mcap_provider.wait_usable())
+        await asyncio.wait([usable_task, mcap_task], return_when=asyncio.FIRST_COMPLETED)
+        usable_task.cancel()
 
         eligible = self.mcap_provider.get_eligible_symbols()
         logger.info(f"🎯 Монет с MCap ≥ ${config.MIN_MARKET_CAP/1e6:.0f}M: {len(eligible)}")
 
         # 3. Telegram
-        await self.telegram.initialize()
+        await telegram_task
+        connected = self.exchange_mgr.get_connected_exchanges()
+        total_pairs = sum(len(self.exchange_mgr.get_futures_symbols(e)) for e in connected)
         self.telegram.set_refs(self.scanner, self.exchange_mgr, self.mcap_provider)
         await self.telegram.send_startup_message(len(connected), total_pairs)
 
@@ -87,34 +118,77 @@ class OIScannerBot:
             cap_str += f" (макс ${config.MAX_MARKET_CAP/1e6:.0f}M)"
         logger.info(f"⚙️  OI/MCap ≥ {config.OI_MCAP_RATIO}% | Funding ≤ {config.MAX_FUNDING_RATE}%")
         logger.info(f"⚙️  Спред ≤ ±{config.MAX_PRICE_SPREAD}% | MCap: {cap_str}")
-        logger.info(f"⚙️  Интервал: {config.SCAN_INTERVAL}с")
+        logger.info(f"⚙️  Интервал: {config.SCAN_INTERVAL_MIN}–{config.SCAN_INTERVAL}с (свой у каждой биржи)")
         logger.info("")
         logger.info("🔍 Начинаю сканирование...\n")
 
-        # 5. Main loop
+        # 5. Свой цикл у каждой биржи; сигналы — в общую очередь уведомлений
         self._running = True
-        while self._running:
+        notifier = asyncio.create_task(self._notifier_loop())
+        try:
+            while self._running:
+                self._spawn_exchange_loops()
+                # Соединения, простоявшие почти keep-alive, открываем заново
+                # в фоне — к следующему проходу биржи они уже готовы
+                if self._prewarm_task is None or self._prewarm_task.done():
+                    self._prewarm_task = asyncio.create_task(self.transport.prewarm())
+                if time.time() - self._last_report >= config.SCAN_INTERVAL:
+                    self._report()
+                await asyncio.sleep(1)
+        finally:
+            tasks = [*self._loops.values(), notifier, *filter(None, [self._prewarm_task])]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _spawn_exchange_loops(self):
+        """Цикл для каждой подключённой биржи (в т.ч. переподключённой супервизором)"""
+        for eid in self.exchange_mgr.get_connected_exchanges():
+            task = self._loops.get(eid)
+            if task is None or task.done():
+                self._loops[eid] = asyncio.create_task(self._exchange_loop(eid))
+
+    async def _exchange_loop(self, eid: str):
+        """
+        Независимый цикл одной биржи. Пауза между проходами — своя:
+        из длительности прохода и расхода бюджета веса (suggest_interval),
+        поэтому быстрые биржи дают сигналы со своей естественной частотой.
+        Пауза растёт при падении здоровья биржи, при открытом
+        bulk-breaker проходы пропускаются.
+        Биржа отключилась — цикл завершается, после переподключения
+        его заново запустит _spawn_exchange_loops.
+        """
+        while self._running and eid in self.exchange_mgr.exchanges:
+            # Bulk-breaker открыт — проход бессмысленен, ждём пробного запроса
+            blocked = self.exchange_mgr.blocked_for(eid)
+            if blocked is not None:
+                await asyncio.sleep(max(1.0, min(blocked, config.SCAN_INTERVAL)))
+                continue
+            t0 = time.time()
+            weight0 = self.exchange_mgr.get_weight_spent(eid)
             try:
-                await self._scan_cycle()
+                await self._scan_exchange(eid)
             except Exception as e:
-                logger.error(f"❌ Ошибка цикла: {e}")
+                logger.error(f"❌ Ошибка цикла {eid}: {e}")
                 import traceback
                 traceback.print_exc()
+            elapsed = time.time() - t0
+            weight = self.exchange_mgr.get_weight_spent(eid) - weight0
+            self._cadence[eid] = interval = self.exchange_mgr.suggest_interval(eid, elapsed, weight)
+            await asyncio.sleep(max(0.0, interval - elapsed))
 
-            for _ in range(config.SCAN_INTERVAL):
-                if not self._running:
-                    break
-                await asyncio.sleep(1)
+    def _ensure_mcap_fresh(self):
+        """Устаревшие маркеткапы обновляются в фоне, сканирование не ждёт"""
+        if self.mcap_provider.is_stale and not self.mcap_provider.is_refreshing:
+            self._mcap_task = asyncio.create_task(self.mcap_provider.refresh_cache())
 
-    async def _scan_cycle(self):
-        self._cycle += 1
-        t0 = time.time()
+    async def _scan_exchange(self, eid: str):
+        self._cycles[eid] = cycle = self._cycles.get(eid, 0) + 1
+        if not self._first_cycle_logged:
+            self._first_cycle_logged = True
+            logger.info(f"   ⏱ Старт → первый цикл: {time.time() - self._boot_time:.1f}с")
 
-        logger.info(f"━━━ Цикл #{self._cycle} ━━━━━━━━━━━━━━━━━━━")
-
-        # Refresh маркеткапов
-        if self.mcap_provider.is_stale:
-            await self.mcap_provider.refresh_cache()
+        self._ensure_mcap_fresh()
 
         # Множество подходящих монет
         eligible_symbols = self.mcap_provider.get_eligible_symbols()
@@ -122,58 +196,75 @@ class OIScannerBot:
             logger.warning("⚠️  Нет подходящих монет в кэше маркеткапов")
             return
 
-        # Сброс диагностики цикла
-        self.scanner.reset_diagnostics()
+        mcap_lookup = dict(self.mcap_provider._cache)
+        prefilter = functools.partial(self.scanner.prefilter, mcap_lookup=mcap_lookup)
 
-        # Параллельное сканирование бирж
-        exchanges = self.exchange_mgr.get_connected_exchanges()
+        all_data = await self.exchange_mgr.fetch_all_data(
+            eid, target_bases=eligible_symbols, prefilter=prefilter,
+        )
+        if not all_data:
+            return
 
-        async def scan_one(eid: str):
+        # Общий оценщик (кулдауны и диагностика — на все биржи)
+        signals = self.scanner.evaluate_batch(all_data, mcap_lookup)
+        signals.sort(key=lambda s: s.score, reverse=True)
+        for signal in signals:
+            self._signals.put_nowait(signal)
+        if signals:
+            logger.info(f"   💊 {eid} #{cycle}: сигналов {len(signals)}")
+
+    async def _notifier_loop(self):
+        """Единый отправитель: сигналы всех бирж по очереди"""
+        while True:
+            signal = await self._signals.get()
             try:
-                all_data = await self.exchange_mgr.fetch_all_data(eid, target_bases=eligible_symbols)
-                if not all_data:
-                    return []
-                mcap_lookup = dict(self.mcap_provider._cache)
-                return self.scanner.evaluate_batch(all_data, mcap_lookup)
+                await self.telegram.send_signal(signal)
+                self._total_signals += 1
             except Exception as e:
-                logger.warning(f"⚠️  {eid}: {e}")
-                return []
-
-        results = await asyncio.gather(
-            *[scan_one(eid) for eid in exchanges],
-            return_exceptions=True,
-        )
-
-        # Собираем сигналы
-        all_signals = []
-        for r in results:
-            if isinstance(r, list):
-                all_signals.extend(r)
-        all_signals.sort(key=lambda s: s.score, reverse=True)
+                logger.warning(f"⚠️  Отправка сигнала: {e}")
+            if not self._first_signal_logged:
+                self._first_signal_logged = True
+                logger.info(f"   ⏱ Time-to-first-signal: {time.time() - self._boot_time:.1f}с")
 
-        # Отправляем
-        for signal in all_signals:
-            await self.telegram.send_signal(signal)
-            self._total_signals += 1
+    def _report(self):
+        """Сводка раз в SCAN_INTERVAL: фильтры, частоты бирж, JSON, HTTP"""
+        self._reports += 1
+        self._last_report = time.time()
 
         # Cleanup
-        if self._cycle % 10 == 0:
+        if self._reports % 10 == 0:
             self.scanner.cleanup_cooldowns()
 
-        elapsed = time.time() - t0
-
         # ДИАГНОСТИКА — показываем на каком этапе отсеиваются монеты
         diag = self.scanner.get_diagnostics()
+        logger.info(f"━━━ Сводка #{self._reports} ━━━━━━━━━━━━━━━━━━━")
         logger.info(f"   📋 Фильтры: {diag}")
+        logger.info(f"   🧭 План: {' → '.join(self.scanner.plan_stages())} → OI")
+        cadence = " | ".join(
+            f"{eid} {self._cadence.get(eid, 0):.0f}с ×{n}" for eid, n in sorted(self._cycles.items())
+        )
+        logger.info(f"   🔁 Циклы: {cadence or '-'}")
+        decode = ", ".join(
+            f"{name} {ms:.0f}мс/{size // 1024}КБ" for name, _, ms, size in jsondecode.stats.top(4)
+        )
+        logger.info(f"   🧩 JSON ({jsondecode.DECODER}): {jsondecode.stats.total_ms():.0f}мс | {decode or '-'}")
+        http = self.transport.get_stats()
         logger.info(
-            f"   ✅ Цикл #{self._cycle} за {elapsed:.1f}с | "
-            f"Сигналов: {len(all_signals)} (всего: {self._total_signals})"
+            f"   🔗 HTTP: запросов {http['requests']} | новых соединений {http['new_connections']} "
+            f"(TLS {http['tls_handshakes']}) | переиспользовано {http['reused']} ({http['reuse_pct']}%) | "
+            f"DNS кэш {http['dns_hits']}/{http['dns_hits'] + http['dns_misses']} | прогрев {http['prewarmed']}"
         )
+        logger.info(f"   ✅ Сигналов: {self._total_signals} | в очереди: {self._signals.qsize()}")
+
+        # Сброс диагностики окна
+        self.scanner.reset_diagnostics()
+        jsondecode.stats.reset()
 
     async def stop(self):
         self._running = False
         await self.telegram.shutdown()
         await self.exchange_mgr.close()
+        await self.transport.close()
         logger.info("👋 Бот остановлен")
 
 
@@ -0,0 +1,69 @@
+"""
+market_cache.py — Кэш рынков бирж на диске
+Тёплый старт: рынки из файла сразу, сверка с биржей в фоне
+"""
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import ccxt
+
+import config
+import jsondecode
+
+logger = logging.getLogger("oi_scanner")
+
+# Меняется при изменении формата файла
+SCHEMA_VERSION = 1
+
+
+def _path(eid: str, kind: str) -> Path:
+    return Path(config.MARKETS_CACHE_DIR) / f"{eid}_{kind}.json"
+
+
+def save(eid: str, kind: str, exchange: Any):
+    """Сохранить рынки клиента (kind: swap | spot). Запись атомарная."""
+    path = _path(eid, kind)
+    payload = {
+        "schema": SCHEMA_VERSION,
+        "ccxt": ccxt.__version__,
+        "exchange": eid,
+        "saved_at": time.time(),
+        "markets": exchange.markets,
+        "currencies": exchange.currencies,
+    }
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(payload, f, separators=(",", ":"))
+        os.replace(tmp, path)
+    except (OSError, TypeError, ValueError) as e:
+        logger.debug(f"Кэш рынков {eid}/{kind}: запись не удалась: {e}")
+
+
+def load(eid: str, kind: str) -> Optional[Dict]:
+    """
+    Прочитать рынки из файла. None — файла нет, он устарел
+    (MARKETS_CACHE_MAX_AGE) или записан другой версией схемы/ccxt.
+    """
+    path = _path(eid, kind)
+    try:
+        with open(path, "rb") as f:
+            payload = jsondecode.loads(f.read(), f"disk:{eid}:{kind}")
+    except (OSError, ValueError):
+        return None
+
+    if (
+        payload.get("schema") != SCHEMA_VERSION
+        or payload.get("ccxt") != ccxt.__version__
+        or payload.get("exchange") != eid
+        or not payload.get("markets")
+    ):
+        return None
+    if time.time() - payload.get("saved_at", 0) > config.MARKETS_CACHE_MAX_AGE:
+        return None
+    return payload
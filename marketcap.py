@@ -3,6 +3,7 @@ marketcap.py — Провайдер маркеткапов через CoinGecko
 Async, кэш, полная загрузка
 """
 import asyncio
+import contextlib
 import time
 import logging
 from typing import Dict, Optional, Set
@@ -10,6 +11,7 @@ from typing import Dict, Optional, Set
 import aiohttp
 
 import config
+import jsondecode
 
 logger = logging.getLogger("oi_scanner")
 
@@ -23,12 +25,14 @@ class MarketCapProvider:
     COINGECKO_BASE = "https://api.coingecko.com/api/v3"
     COINGECKO_PRO_BASE = "https://pro-api.coingecko.com/api/v3"
 
-    def __init__(self, api_key: str = "", cache_ttl: int = 300):
+    def __init__(self, api_key: str = "", cache_ttl: int = 300, transport=None):
         self.api_key = api_key
         self.cache_ttl = cache_ttl
+        self.transport = transport  # общий HTTP-пул (transport.py); None — своя сессия
         self._cache: Dict[str, float] = {}  # SYMBOL → mcap_usd
         self._cache_time: float = 0
         self._lock = asyncio.Lock()
+        self._usable = asyncio.Event()  # в кэше есть хоть одна подходящая монета
 
     @property
     def _base_url(self) -> str:
@@ -44,6 +48,25 @@ class MarketCapProvider:
     def is_stale(self) -> bool:
         return not self._cache or (time.time() - self._cache_time) >= self.cache_ttl
 
+    @property
+    def is_refreshing(self) -> bool:
+        return self._lock.locked()
+
+    async def wait_usable(self):
+        """Дождаться таблицы, по которой уже можно сканировать (хоть частичной)"""
+        await self._usable.wait()
+
+    def _publish_partial(self, coins: Dict[str, float]):
+        """
+        Первая загрузка: отдаём частичную таблицу после каждой страницы,
+        чтобы первый цикл не ждал все 10 страниц.
+        """
+        if self._cache_time:
+            return
+        self._cache = dict(coins)
+        if self.get_eligible_symbols():
+            self._usable.set()
+
     async def refresh_cache(self):
         """Загрузить маркеткапы всех монет"""
         async with self._lock:
@@ -55,10 +78,7 @@ class MarketCapProvider:
             start = time.time()
 
             try:
-                async with aiohttp.ClientSession(
-                    timeout=aiohttp.ClientTimeout(total=30),
-                    headers=self._headers(),
-                ) as session:
+                async with self._session() as session:
                     for page in range(1, 11):  # До 2500 монет
                         try:
                             data = await self._fetch_page(session, page)
@@ -72,6 +92,7 @@ class MarketCapProvider:
                                     existing = all_coins.get(sym, 0)
                                     if mcap > existing:
                                         all_coins[sym] = mcap
+                            self._publish_partial(all_coins)
 
                             if not self.api_key:
                                 await asyncio.sleep(1.5)
@@ -91,6 +112,7 @@ class MarketCapProvider:
             if all_coins:
                 self._cache = all_coins
                 self._cache_time = time.time()
+                self._usable.set()
                 elapsed = time.time() - start
 
                 # Диагностика
@@ -107,6 +129,19 @@ class MarketCapProvider:
             else:
                 logger.warning("⚠️  Маркеткапы не загружены!")
 
+    @contextlib.asynccontextmanager
+    async def _session(self):
+        """Сессия общего пула (соединение с CoinGecko живёт между обновлениями)"""
+        if self.transport is not None:
+            yield self.transport.open()
+            return
+        async with aiohttp.ClientSession() as session:
+            yield session
+
+    @staticmethod
+    def _loads(text: str):
+        return jsondecode.loads(text, "coingecko:markets")
+
     async def _fetch_page(self, session: aiohttp.ClientSession, page: int) -> list:
         url = f"{self._base_url}/coins/markets"
         params = {
@@ -116,9 +151,12 @@ class MarketCapProvider:
             "page": str(page),
             "sparkline": "false",
         }
-        async with session.get(url, params=params) as resp:
+        async with session.get(
+            url, params=params, headers=self._headers(),
+            timeout=aiohttp.ClientTimeout(total=30),
+        ) as resp:
             resp.raise_for_status()
-            return await resp.json()
+            return await resp.json(loads=self._loads)
 
     def get_market_cap(self, symbol: str) -> Optional[float]:
         return self._cache.get(symbol.upper())
@@ -0,0 +1,311 @@
+"""
+ratelimit.py — Адаптивный контроль нагрузки на биржи
+AIMD-лимит параллельных запросов, бюджет веса запросов и повторы на каждую биржу
+"""
+import asyncio
+import random
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Dict, Mapping, Optional
+
+import ccxt.async_support as ccxt
+
+
+class AdaptiveLimiter:
+    """
+    AIMD-лимит параллельных запросов одной биржи.
+
+    - Успех с нормальной задержкой → лимит растёт на +1 за «окно» (1/limit на ответ)
+    - 429 / DDoS-защита → лимит ×0.5
+    - Таймаут или всплеск задержки → лимит ×0.7
+    Снижение не чаще раза в DECREASE_COOLDOWN: пачка одновременных 429
+    от одного всплеска режет лимит один раз, а не в ноль.
+    """
+
+    THROTTLE_FACTOR = 0.5
+    SLOW_FACTOR = 0.7
+    DECREASE_COOLDOWN = 2.0
+    # Задержка > SPIKE_RATIO × средняя (и > min_spike секунд) — всплеск
+    SPIKE_RATIO = 3.0
+    EWMA_ALPHA = 0.2
+
+    def __init__(self, initial: int = 5, min_limit: int = 1, max_limit: int = 50,
+                 min_spike: float = 2.0):
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.min_spike = min_spike
+        self.latency: Optional[float] = None  # EWMA задержки, сек
+        self.in_flight = 0
+        self.throttled = 0
+        self.timeouts = 0
+        self.errors = 0
+        self.requests = 0
+        self._last_decrease = 0.0
+        self._cond = asyncio.Condition()
+
+    @property
+    def current(self) -> int:
+        return max(self.min_limit, int(self.limit))
+
+    async def acquire(self):
+        async with self._cond:
+            await self._cond.wait_for(lambda: self.in_flight < self.current)
+            self.in_flight += 1
+
+    async def release(self):
+        async with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+    @asynccontextmanager
+    async def slot(self):
+        """Слот на один запрос: задержка и исход меняют лимит"""
+        await self.acquire()
+        start = time.monotonic()
+        try:
+            yield
+        except (ccxt.RateLimitExceeded, ccxt.DDoSProtection):
+            self.throttled += 1
+            self._decrease(self.THROTTLE_FACTOR)
+            raise
+        except ccxt.RequestTimeout:
+            self.timeouts += 1
+            self._decrease(self.SLOW_FACTOR)
+            raise
+        except Exception:
+            # Ошибки символа (BadSymbol, NotSupported) не говорят о перегрузке
+            self.errors += 1
+            raise
+        else:
+            self._on_success(time.monotonic() - start)
+        finally:
+            self.requests += 1
+            await self.release()
+
+    def _on_success(self, latency: float):
+        avg = self.latency
+        self.latency = latency if avg is None else avg + self.EWMA_ALPHA * (latency - avg)
+        if avg is not None and latency > max(self.min_spike, avg * self.SPIKE_RATIO):
+            self._decrease(self.SLOW_FACTOR)
+            return
+        self.limit = min(self.max_limit, self.limit + 1.0 / self.current)
+
+    def _decrease(self, factor: float):
+        now = time.monotonic()
+        if now - self._last_decrease < self.DECREASE_COOLDOWN:
+            return
+        self._last_decrease = now
+        self.limit = max(self.min_limit, self.limit * factor)
+
+    def get_stats(self) -> dict:
+        return {
+            "limit": self.current,
+            "in_flight": self.in_flight,
+            "latency_ms": int(self.latency * 1000) if self.latency is not None else -1,
+            "requests": self.requests,
+            "throttled": self.throttled,
+            "timeouts": self.timeouts,
+            "errors": self.errors,
+        }
+
+
+@dataclass(frozen=True, slots=True)
+class BudgetSpec:
+    """
+    Лимит биржи: capacity единиц веса за window секунд (по документации биржи).
+
+    costs           — вес запроса по типу (tickers, oi_one, implicit-метод, ...)
+    used_header     — заголовок с уже израсходованным весом окна
+    remaining_header — заголовок с остатком запросов окна
+    """
+    capacity: int
+    window: float
+    costs: Dict[str, int] = field(default_factory=dict)
+    default_cost: int = 1
+    used_header: str = ""
+    remaining_header: str = ""
+
+
+# Один бюджет на биржу: тикеры, фандинг, OI, спот и фоллбэки делят его.
+BUDGETS: Dict[str, BudgetSpec] = {
+    "binance": BudgetSpec(
+        capacity=2400, window=60,
+        costs={
+            "markets": 50, "tickers": 40, "funding": 10, "spot_tickers": 80,
+            "funding_one": 1, "oi_one": 1, "fapiPublicGetPremiumIndex": 10,
+            "fapiPublicGetTickerPrice": 2,
+        },
+        used_header="x-mbx-used-weight-1m",
+    ),
+    "bybit": BudgetSpec(capacity=600, window=5, costs={"markets": 5}),
+    "okx": BudgetSpec(capacity=20, window=2, costs={"markets": 4}),
+    "bitget": BudgetSpec(capacity=20, window=1, costs={"markets": 3}),
+    "gateio": BudgetSpec(
+        capacity=200, window=10, costs={"markets": 3},
+        remaining_header="x-gate-ratelimit-requests-remain",
+    ),
+    "mexc": BudgetSpec(capacity=20, window=2, costs={"markets": 3}),
+    "kucoin": BudgetSpec(
+        capacity=2000, window=30, default_cost=2,
+        costs={"markets": 20, "tickers": 15, "spot_tickers": 15},
+        remaining_header="gw-ratelimit-remaining",
+    ),
+    "bingx": BudgetSpec(capacity=100, window=10, costs={"markets": 3}),
+}
+
+
+class WeightBudget:
+    """
+    Бюджет веса запросов одной биржи на фиксированное окно.
+
+    Расход считается локально по таблице весов и сверяется с заголовками
+    биржи (берётся максимум: заголовок знает про чужие запросы с нашего IP).
+    Запрос, не помещающийся в utilization × capacity, ждёт начала
+    следующего окна. Заменяет throttle ccxt (enableRateLimit=False).
+    """
+
+    def __init__(self, spec: BudgetSpec, utilization: float = 0.9):
+        self.spec = spec
+        self.limit = spec.capacity * utilization
+        self.used = 0.0
+        self.spent = 0.0  # всего списано с запуска
+        self.waits = 0
+        self.wait_time = 0.0
+        self._window_start = self._current_window()
+        self._lock = asyncio.Lock()
+
+    def _current_window(self) -> float:
+        window = self.spec.window
+        return time.time() // window * window
+
+    def _roll(self):
+        window = self._current_window()
+        if window != self._window_start:
+            self._window_start = window
+            self.used = 0.0
+
+    def cost(self, kind: str) -> int:
+        return self.spec.costs.get(kind, self.spec.default_cost)
+
+    async def acquire(self, kind: str):
+        """Списать вес запроса; ждать следующего окна, если бюджет исчерпан"""
+        cost = self.cost(kind)
+        async with self._lock:
+            while True:
+                self._roll()
+                # Дорогой запрос в пустом окне пропускаем всегда
+                if self.used + cost <= self.limit or self.used == 0:
+                    self.used += cost
+                    self.spent += cost
+                    return
+                delay = self._window_start + self.spec.window - time.time()
+                self.waits += 1
+                self.wait_time += max(0.0, delay)
+                await asyncio.sleep(max(0.05, delay))
+
+    def refund(self, kind: str):
+        """Вернуть вес запроса, который так и не был отправлен"""
+        cost = self.cost(kind)
+        self._roll()
+        self.used = max(0.0, self.used - cost)
+        self.spent -= cost
+
+    def observe(self, headers: Optional[Mapping[str, str]]):
+        """Сверить расход с заголовками ответа"""
+        if not headers:
+            return
+        spec = self.spec
+        lowered = {k.lower(): v for k, v in headers.items()}
+        self._roll()
+        try:
+            if spec.used_header and spec.used_header in lowered:
+                self.used = max(self.used, float(lowered[spec.used_header]))
+            elif spec.remaining_header and spec.remaining_header in lowered:
+                remaining = float(lowered[spec.remaining_header])
+                self.used = max(self.used, spec.capacity - remaining)
+        except (TypeError, ValueError):
+            pass
+
+    def get_stats(self) -> dict:
+        self._roll()
+        return {
+            "used": int(self.used),
+            "capacity": self.spec.capacity,
+            "window": self.spec.window,
+            "waits": self.waits,
+            "wait_sec": round(self.wait_time, 1),
+        }
+
+
+def budget_for(eid: str, rate_limit_ms: float, utilization: float = 0.9) -> WeightBudget:
+    """Бюджет биржи из таблицы; для неизвестной — из rateLimit ccxt"""
+    spec = BUDGETS.get(eid)
+    if spec is None:
+        spec = BudgetSpec(capacity=max(1, int(10_000 / max(rate_limit_ms, 1))), window=10)
+    return WeightBudget(spec, utilization)
+
+
+class RetryPolicy:
+    """
+    Повторы запросов одной биржи.
+
+    - 429 / DDoS-защита → пауза всей биржи (Retry-After или rate_limit_pause):
+      новые запросы ждут её окончания, а не бьют в лимит дальше
+    - повтор с экспоненциальной паузой и джиттером; пауза идёт вне слота
+      AdaptiveLimiter, слот свободен для других запросов
+    - бюджет повторов на проход биржи: деградация не умножает нагрузку
+    """
+
+    def __init__(self, budget: int = 30, max_attempts: int = 3, base_delay: float = 0.5,
+                 rate_limit_pause: float = 2.0):
+        self.budget = budget
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.rate_limit_pause = rate_limit_pause
+        self.pause_until = 0.0
+        self.pauses = 0
+        self.left = budget
+        self.retried = 0     # за проход
+        self.recovered = 0   # за проход: успех после повтора
+
+    def new_cycle(self):
+        self.left = self.budget
+        self.retried = 0
+        self.recovered = 0
+
+    def pause(self, retry_after: Optional[float] = None):
+        """Приостановить все запросы биржи после 429"""
+        seconds = retry_after if retry_after else self.rate_limit_pause * random.uniform(1.0, 1.5)
+        until = time.monotonic() + seconds
+        if until > self.pause_until:
+            self.pause_until = until
+            self.pauses += 1
+
+    async def wait_pause(self):
+        delay = self.pause_until - time.monotonic()
+        while delay > 0:
+            await asyncio.sleep(delay)
+            delay = self.pause_until - time.monotonic()
+
+    def take(self, attempt: int) -> bool:
+        """Можно ли сделать повтор номер attempt (с 1)"""
+        if attempt >= self.max_attempts or self.left <= 0:
+            return False
+        self.left -= 1
+        self.retried += 1
+        return True
+
+    def delay(self, attempt: int) -> float:
+        """Пауза перед повтором: base × 2^(attempt-1), джиттер 50–150%"""
+        return self.base_delay * 2 ** (attempt - 1) * random.uniform(0.5, 1.5)
+
+    def get_stats(self) -> dict:
+        return {
+            "retried": self.retried,
+            "recovered": self.recovered,
+            "budget_left": self.left,
+            "pauses": self.pauses,
+            "paused_for": round(max(0.0, self.pause_until - time.monotonic()), 1),
+        }
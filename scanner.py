@@ -55,6 +55,9 @@ class Signal:
 class StrategyScanner:
     """Сканер с диагностикой"""
 
+    # Дешёвые этапы: нужны только bulk-данные, до загрузки OI
+    CHEAP_STAGES = ("mcap", "funding", "spread")
+
     def __init__(self):
         self._cooldowns: Dict[str, float] = {}
         self.signals_generated = 0
@@ -64,6 +67,86 @@ class StrategyScanner:
         self._diag = {"no_mcap": 0, "mcap_low": 0, "mcap_high": 0,
                        "oi_low": 0, "funding_high": 0, "spread_high": 0,
                        "cooldown": 0, "passed": 0}
+        # Накопленная селективность дешёвых этапов: этап → [видел, отсеял]
+        self._stage_totals = {stage: [0, 0] for stage in self.CHEAP_STAGES}
+
+    # ──── Проверки этапов: None = прошёл, иначе ключ _diag ────
+
+    @staticmethod
+    def _check_mcap(mcap: Optional[float]) -> Optional[str]:
+        if mcap is None or mcap <= 0:
+            return "no_mcap"
+        if mcap < config.MIN_MARKET_CAP:
+            return "mcap_low"
+        if config.MAX_MARKET_CAP > 0 and mcap > config.MAX_MARKET_CAP:
+            return "mcap_high"
+        return None
+
+    @staticmethod
+    def _check_funding(funding_rate: float) -> Optional[str]:
+        if funding_rate > config.MAX_FUNDING_RATE:
+            return "funding_high"
+        return None
+
+    @staticmethod
+    def _spread(futures_price: float, spot_price: Optional[float]) -> Optional[float]:
+        if spot_price and spot_price > 0:
+            return ((futures_price - spot_price) / spot_price) * 100
+        return None
+
+    @staticmethod
+    def _check_spread(price_spread: Optional[float]) -> Optional[str]:
+        if price_spread is not None and abs(price_spread) > config.MAX_PRICE_SPREAD:
+            return "spread_high"
+        return None
+
+    # ═══════════════ Планировщик фильтров ═══════════════
+
+    def plan_stages(self) -> List[str]:
+        """Порядок дешёвых этапов: самые селективные — первыми"""
+        def selectivity(stage: str) -> float:
+            seen, rejected = self._stage_totals[stage]
+            return rejected / seen if seen else 0.0
+        return sorted(self.CHEAP_STAGES, key=selectivity, reverse=True)
+
+    def prefilter(self, rows: List[Dict], mcap_lookup: Dict[str, float],
+                  stages: Optional[List[str]] = None) -> List[Dict]:
+        """
+        Отсеять монеты по дешёвым bulk-данным ДО загрузки OI.
+
+        rows: [{base, funding_rate, futures_price, spot_price?, ...}]
+        Спред проверяется только там, где уже известна спот-цена.
+        Отсеянные монеты учитываются в диагностике как просканированные.
+        Выжившим добавляется поле mcap.
+        """
+        order = stages or self.plan_stages()
+        survivors = []
+        for row in rows:
+            mcap = mcap_lookup.get(row["base"].upper())
+            reason = None
+            for stage in order:
+                if stage == "mcap":
+                    reason = self._check_mcap(mcap)
+                elif stage == "funding":
+                    reason = self._check_funding(row["funding_rate"])
+                else:
+                    spread = self._spread(row["futures_price"], row.get("spot_price"))
+                    if spread is None:
+                        continue
+                    reason = self._check_spread(spread)
+
+                self._stage_totals[stage][0] += 1
+                if reason:
+                    self._stage_totals[stage][1] += 1
+                    break
+
+            if reason:
+                self._diag[reason] += 1
+                self.coins_scanned += 1
+            else:
+                row["mcap"] = mcap
+                survivors.append(row)
+        return survivors
 
     def evaluate_batch(self, all_data: Dict[str, Dict], mcap_lookup: Dict[str, float]) -> List[Signal]:
         """Оценить пачку монет, вернуть сигналы отсортированные по score"""
@@ -88,16 +171,9 @@ class StrategyScanner:
         spot_price = coin_data.get("spot_price")
 
         # ──── MCap фильтр ────
-        if mcap is None or mcap <= 0:
-            self._diag["no_mcap"] += 1
-            return None
-
-        if mcap < config.MIN_MARKET_CAP:
-            self._diag["mcap_low"] += 1
-            return None
-
-        if config.MAX_MARKET_CAP > 0 and mcap > config.MAX_MARKET_CAP:
-            self._diag["mcap_high"] += 1
+        reason = self._check_mcap(mcap)
+        if reason:
+            self._diag[reason] += 1
             return None
 
         # ──── OI/MCap ────
@@ -107,17 +183,15 @@ class StrategyScanner:
             return None
 
         # ──── Funding ────
-        if funding_rate > config.MAX_FUNDING_RATE:
+        if self._check_funding(funding_rate):
             self._diag["funding_high"] += 1
             return None
 
         # ──── Spread ────
-        price_spread = None
-        if spot_price and spot_price > 0:
-            price_spread = ((futures_price - spot_price) / spot_price) * 100
-            if abs(price_spread) > config.MAX_PRICE_SPREAD:
-                self._diag["spread_high"] += 1
-                return None
+        price_spread = self._spread(futures_price, spot_price)
+        if self._check_spread(price_spread):
+            self._diag["spread_high"] += 1
+            return None
 
         # ──── ВСЕ ФИЛЬТРЫ ПРОЙДЕНЫ 💊 ────
         self._diag["passed"] += 1
@@ -0,0 +1,180 @@
+"""
+stream_replay.py — Запись и проигрывание WS-фреймов бирж
+Локальная подмена биржи для streaming.py: STREAM_URLS=binance=ws://127.0.0.1:8765
+
+    python stream_replay.py record binance frames/binance.jsonl --seconds 60
+    python stream_replay.py serve frames/binance.jsonl --port 8765
+    python stream_replay.py check binance frames/binance.jsonl
+
+Файл фреймов — JSONL: {"t": секунды от начала записи, "data": текст фрейма}
+"""
+import argparse
+import asyncio
+import json
+import logging
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import aiohttp
+from aiohttp import web
+
+from streaming import MarketStream
+
+logger = logging.getLogger("oi_scanner")
+
+
+def load_frames(path: str) -> List[Dict]:
+    frames = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                frames.append(json.loads(line))
+    return frames
+
+
+async def record(eid: str, path: str, seconds: float,
+                 market_ids: Optional[List[str]] = None, url: Optional[str] = None) -> int:
+    """Записать текстовые фреймы биржи за seconds секунд. Returns: число фреймов"""
+    stream = MarketStream(eid, market_ids or [], url=url)
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    count = 0
+    start = time.monotonic()
+    async with aiohttp.ClientSession() as session:
+        async with session.ws_connect(stream.url, heartbeat=stream.PING_INTERVAL) as ws:
+            await stream._subscribe(ws)
+            with open(path, "w", encoding="utf-8") as f:
+                while (left := seconds - (time.monotonic() - start)) > 0:
+                    try:
+                        msg = await ws.receive(timeout=left)
+                    except asyncio.TimeoutError:
+                        break
+                    if msg.type != aiohttp.WSMsgType.TEXT:
+                        break
+                    f.write(json.dumps({"t": round(time.monotonic() - start, 3), "data": msg.data}) + "\n")
+                    count += 1
+    return count
+
+
+class ReplayServer:
+    """
+    WS-сервер, проигрывающий записанные фреймы каждому подключению
+    с исходными паузами (делёнными на speed). Подписки клиента читаются
+    и игнорируются. loop — начинать запись заново, пока клиент подключён.
+    """
+
+    def __init__(self, frames: List[Dict], host: str = "127.0.0.1", port: int = 8765,
+                 speed: float = 1.0, loop: bool = False):
+        self.frames = frames
+        self.host = host
+        self.port = port
+        self.speed = speed
+        self.loop = loop
+        self.connections = 0
+        self._runner: Optional[web.AppRunner] = None
+
+    @property
+    def url(self) -> str:
+        return f"ws://{self.host}:{self.port}/"
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get("/{tail:.*}", self._handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        if not self.port:
+            self.port = self._runner.addresses[0][1]
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _handle(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self.connections += 1
+        reader = asyncio.create_task(self._drain(ws))
+        try:
+            while True:
+                await self._play(ws)
+                if not self.loop or ws.closed:
+                    break
+        except ConnectionResetError:
+            pass
+        finally:
+            reader.cancel()
+            await ws.close()
+        return ws
+
+    async def _play(self, ws: web.WebSocketResponse):
+        prev = 0.0
+        for frame in self.frames:
+            delay = (frame["t"] - prev) / self.speed
+            prev = frame["t"]
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if ws.closed:
+                return
+            await ws.send_str(frame["data"])
+
+    @staticmethod
+    async def _drain(ws: web.WebSocketResponse):
+        async for _ in ws:
+            pass
+
+
+def replay(eid: str, frames: List[Dict]) -> MarketStream:
+    """Применить фреймы к таблице MarketStream без сети"""
+    stream = MarketStream(eid, [], url="ws://replay")
+    for frame in frames:
+        stream.handle_message(json.loads(frame["data"]))
+    return stream
+
+
+async def _serve(args):
+    server = ReplayServer(load_frames(args.path), port=args.port, speed=args.speed, loop=args.loop)
+    await server.start()
+    logger.info(f"▶️ {server.url}: {len(server.frames)} фреймов из {args.path}")
+    await asyncio.Event().wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Запись и проигрывание WS-фреймов бирж")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    rec = sub.add_parser("record")
+    rec.add_argument("eid")
+    rec.add_argument("path")
+    rec.add_argument("--seconds", type=float, default=60)
+    rec.add_argument("--symbols", default="", help="market id через запятую (Bybit)")
+    srv = sub.add_parser("serve")
+    srv.add_argument("path")
+    srv.add_argument("--port", type=int, default=8765)
+    srv.add_argument("--speed", type=float, default=1.0)
+    srv.add_argument("--loop", action="store_true")
+    chk = sub.add_parser("check")
+    chk.add_argument("eid")
+    chk.add_argument("path")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    if args.cmd == "record":
+        symbols = [s for s in args.symbols.split(",") if s]
+        count = asyncio.run(record(args.eid, args.path, args.seconds, symbols))
+        logger.info(f"💾 {args.path}: {count} фреймов")
+    elif args.cmd == "serve":
+        try:
+            asyncio.run(_serve(args))
+        except KeyboardInterrupt:
+            pass
+    else:
+        stream = replay(args.eid, load_frames(args.path))
+        for field in ("price", "funding", "index"):
+            have = sum(1 for row in stream.table.values() if field in row)
+            logger.info(f"   {field}: {have}/{len(stream.table)}")
+
+
+if __name__ == "__main__":
+    main()
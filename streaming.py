@@ -0,0 +1,178 @@
+"""
+streaming.py — WebSocket-стримы тикеров и фандинга
+Всегда свежая in-memory таблица вместо поллинга раз в SCAN_INTERVAL
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+import aiohttp
+
+import jsondecode
+from venues import to_float
+
+logger = logging.getLogger("oi_scanner")
+
+
+class MarketStream:
+    """
+    Публичный WS-стрим одной биржи → таблица {market_id: {price, funding, index}}.
+
+    - Binance: all-market стримы !ticker@arr + !markPrice@arr (без подписок)
+    - Bybit: tickers.{symbol} (snapshot + delta), подписка пачками по 10
+
+    session — общая сессия пула (transport.py); без неё стрим открывает свою.
+
+    Binance !ticker@arr шлёт только символы с изменениями: контракт без
+    сделок после подключения остался бы без цены. Такие поля (PARTIAL)
+    дозаполняются REST-снапшотом через seed() после каждого подключения.
+
+    url можно подменить локальным WS-сервером, который проигрывает
+    записанные фреймы (stream_replay.py), — разбор целиком в handle_message().
+    """
+
+    URLS = {
+        "binance": "wss://fstream.binance.com/stream?streams=!ticker@arr/!markPrice@arr@1s",
+        "bybit": "wss://stream.bybit.com/v5/public/linear",
+    }
+
+    # Поля, которые стрим присылает только по изменению
+    PARTIAL = {
+        "binance": ("price",),
+    }
+
+    # Лимит топиков в одном subscribe у Bybit
+    BYBIT_SUBSCRIBE_CHUNK = 10
+    PING_INTERVAL = 20
+    MAX_BACKOFF = 30
+
+    def __init__(self, eid: str, market_ids: List[str], url: Optional[str] = None,
+                 session: Optional[aiohttp.ClientSession] = None):
+        self.eid = eid
+        self.url = url or self.URLS[eid]
+        self.session = session
+        self.market_ids = market_ids
+        self.table: Dict[str, Dict[str, float]] = {}
+        self.last_message: float = 0
+        self.messages = 0
+        self.reconnects = 0
+        self.seeded: set = set()  # PARTIAL-поля, дозаполненные с подключения
+        self._task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def supports(cls, eid: str) -> bool:
+        return eid in cls.URLS
+
+    def is_fresh(self, max_age: float) -> bool:
+        return bool(self.table) and (time.time() - self.last_message) <= max_age
+
+    def is_complete(self, name: str) -> bool:
+        """Поле есть у всех контрактов (не PARTIAL или уже дозаполнено)"""
+        return name not in self.PARTIAL.get(self.eid, ()) or name in self.seeded
+
+    def seed(self, name: str, values: Dict[str, float]):
+        """Дозаполнить поле из REST: {market_id: value}, стрим имеет приоритет"""
+        for market_id, value in values.items():
+            row = self.table.setdefault(market_id, {})
+            row.setdefault(name, value)
+        self.seeded.add(name)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    # ═══════════════ Подключение ═══════════════
+
+    async def _run(self):
+        """Подключение с переподключением и экспоненциальной паузой"""
+        backoff = 1
+        while True:
+            received = self.messages
+            try:
+                if self.session is not None and not self.session.closed:
+                    await self._listen(self.session)
+                else:
+                    async with aiohttp.ClientSession() as session:
+                        await self._listen(session)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"WS {self.eid}: {e}")
+
+            if self.messages > received:
+                backoff = 1  # соединение работало — начинаем паузы заново
+            self.reconnects += 1
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, self.MAX_BACKOFF)
+
+    async def _listen(self, session: aiohttp.ClientSession):
+        async with session.ws_connect(self.url, heartbeat=self.PING_INTERVAL) as ws:
+            self.seeded.clear()  # пока стрим лежал, изменения пропущены
+            await self._subscribe(ws)
+            async for msg in ws:
+                if msg.type == aiohttp.WSMsgType.TEXT:
+                    self.handle_message(jsondecode.loads(msg.data, f"ws:{self.eid}"))
+                elif msg.type in (aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
+                    break
+
+    async def _subscribe(self, ws):
+        if self.eid != "bybit":
+            return
+        topics = [f"tickers.{mid}" for mid in self.market_ids]
+        for i in range(0, len(topics), self.BYBIT_SUBSCRIBE_CHUNK):
+            await ws.send_json({"op": "subscribe", "args": topics[i:i + self.BYBIT_SUBSCRIBE_CHUNK]})
+
+    # ═══════════════ Разбор фреймов ═══════════════
+
+    def handle_message(self, msg: Any):
+        """Применить один фрейм биржи к таблице"""
+        self.messages += 1
+        if self.eid == "binance":
+            self._handle_binance(msg)
+        elif self.eid == "bybit":
+            self._handle_bybit(msg)
+
+    def _update(self, market_id: str, **values: Optional[float]):
+        row = self.table.setdefault(market_id, {})
+        for key, value in values.items():
+            if value is not None:
+                row[key] = value
+        self.last_message = time.time()
+
+    def _handle_binance(self, msg: Dict):
+        stream = msg.get("stream", "")
+        data = msg.get("data")
+        if not isinstance(data, list):
+            return
+        if stream.startswith("!ticker"):
+            for t in data:
+                self._update(t["s"], price=to_float(t.get("c")))
+        elif stream.startswith("!markPrice"):
+            for t in data:
+                self._update(t["s"], funding=to_float(t.get("r")), index=to_float(t.get("i")))
+
+    def _handle_bybit(self, msg: Dict):
+        if not msg.get("topic", "").startswith("tickers."):
+            return
+        data = msg.get("data") or {}
+        symbol = data.get("symbol")
+        if not symbol:
+            return
+        # delta содержит только изменившиеся поля
+        self._update(
+            symbol,
+            price=to_float(data.get("lastPrice")),
+            funding=to_float(data.get("fundingRate")),
+            index=to_float(data.get("indexPrice")),
+        )
+
@@ -4,6 +4,7 @@ telegram_bot.py — Telegram-бот для отправки сигналов
 """
 import asyncio
 import logging
+import time
 from typing import Optional, TYPE_CHECKING
 
 from telegram import Update, Bot
@@ -186,7 +187,7 @@ class TelegramNotifier:
             "🚀 *OI Scanner Bot запущен*\n\n"
             f"📡 Бирж: {exchanges}\n"
             f"🔍 Фьючерсных пар: {pairs}\n"
-            f"⏱ Интервал: {config.SCAN_INTERVAL}с\n\n"
+            f"⏱ Интервал: {config.SCAN_INTERVAL_MIN}–{config.SCAN_INTERVAL}с\n\n"
             f"*Пороги:*\n"
             f"• OI/MCap ≥ {config.OI_MCAP_RATIO}%\n"
             f"• Funding ≤ {config.MAX_FUNDING_RATE}%\n"
@@ -207,10 +208,24 @@ class TelegramNotifier:
             lines.append(f"📡 Бирж: {s['total_connected']} — {', '.join(names)}")
             if s["failed"]:
                 lines.append(f"❌ Ошибки: {', '.join(s['failed'].keys())}")
+            now = time.time()
+            for eid, at in s["retry_at"].items():
+                name = self._exchange_ref.EXCHANGE_NAMES.get(eid, eid)
+                lines.append(f"🔁 {name}: переподключение через {max(0, int(at - now))}с")
+            for eid, health in s["health"].items():
+                tripped = [
+                    f"{cls} {b['state']}" for cls, b in health["breakers"].items() if b["state"] != "closed"
+                ]
+                if tripped:
+                    name = self._exchange_ref.EXCHANGE_NAMES.get(eid, eid)
+                    lines.append(f"🩺 {name}: {health['score']:g} — {', '.join(tripped)}")
+            for ts, eid, event in s["reconnects"][-5:]:
+                name = self._exchange_ref.EXCHANGE_NAMES.get(eid, eid)
+                lines.append(f"  • {time.strftime('%H:%M:%S', time.localtime(ts))} {name}: {event}")
 
         if self._mcap_ref:
             ms = self._mcap_ref.get_stats()
-            lines.append(f"💎 MCap кэш: {ms['cached_coins']} монет | {ms['low_caps']} лоукапов")
+            lines.append(f"💎 MCap кэш: {ms['cached_coins']} монет | {ms['eligible']} подходят")
 
         if self._scanner_ref:
             ss = self._scanner_ref.get_stats()
@@ -225,10 +240,29 @@ class TelegramNotifier:
         lines = ["📈 *Статистика*\n"]
 
         if self._exchange_ref:
+            concurrency = self._exchange_ref.get_concurrency()
+            missed = self._exchange_ref.get_missed_deadlines()
+            negative = self._exchange_ref.get_status()["negative"]
             for eid in self._exchange_ref.get_connected_exchanges():
                 n = len(self._exchange_ref.get_futures_symbols(eid))
                 name = self._exchange_ref.EXCHANGE_NAMES.get(eid, eid)
-                lines.append(f"  📡 {name}: {n} пар")
+                c = concurrency.get(eid, {})
+                line = f"  📡 {name}: {n} пар | ⚡ {c.get('limit', '-')} ({c.get('latency_ms', -1)}мс)"
+                if missed.get(eid):
+                    line += f" | ⏳ {sum(missed[eid].values())}"
+                score = self._exchange_ref.get_health_score(eid)
+                if score < 1:
+                    line += f" | 🩺 {score:g}"
+                neg = negative.get(eid)
+                if neg and neg["blocked"]:
+                    line += f" | 🚫 {neg['blocked']} (сэкономлено {neg['saved']})"
+                lines.append(line)
+            http = self._exchange_ref.get_status()["http"]
+            if http:
+                lines.append(
+                    f"  🔗 HTTP: переиспользовано {http['reuse_pct']}% | "
+                    f"TLS {http['tls_handshakes']} | DNS кэш {http['dns_hits']}"
+                )
 
         lines.append(f"\n⚙️ OI≥{config.OI_MCAP_RATIO}% | F≤{config.MAX_FUNDING_RATE}% | MCap≤${config.MAX_MARKET_CAP/1e6:.0f}M")
         await update.message.reply_text("\n".join(lines), parse_mode=ParseMode.MARKDOWN)
@@ -0,0 +1,152 @@
+"""
+transport.py — Общий HTTP-пул для всех исходящих клиентов
+Один настроенный aiohttp-коннектор на ccxt-клиенты бирж и CoinGecko
+"""
+import asyncio
+import logging
+import time
+from types import SimpleNamespace
+from typing import Dict, Optional
+
+import aiohttp
+from yarl import URL
+
+logger = logging.getLogger("oi_scanner")
+
+
+class SharedTransport:
+    """
+    Общая aiohttp-сессия с пулом соединений.
+
+    - keep-alive: соединения с биржами живут между циклами
+    - DNS-кэш с TTL вместо резолва на каждое новое соединение
+    - лимит соединений на хост (и общий)
+    - прогрев: перед циклом открываем соединения к HTTP(S)-хостам,
+      чьи keep-alive соединения уже могли закрыться; хост без своих
+      запросов дольше FORGET_AFTER (отключённая биржа) забывается
+    - счётчики через TraceConfig: новые соединения (TLS-рукопожатия),
+      переиспользованные, попадания в DNS-кэш
+
+    ccxt получает сессию через ключ "session" и не закрывает её сам
+    (own_session=False) — закрывает close().
+    """
+
+    PREWARM_TIMEOUT = 5
+    FORGET_AFTER = 600
+
+    def __init__(self, limit: int = 100, limit_per_host: int = 16,
+                 dns_ttl: int = 300, keepalive: float = 60):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.dns_ttl = dns_ttl
+        self.keepalive = keepalive
+        self.session: Optional[aiohttp.ClientSession] = None
+        self.requests = 0
+        self.new_connections = 0
+        self.tls_handshakes = 0
+        self.reused = 0
+        self.dns_hits = 0
+        self.dns_misses = 0
+        self.prewarmed = 0
+        self._last_used: Dict[str, float] = {}  # origin → последний свой запрос
+        self._warmed: Dict[str, float] = {}     # origin → последний прогрев
+
+    def open(self) -> aiohttp.ClientSession:
+        """Создать сессию (нужен запущенный event loop)"""
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                ttl_dns_cache=self.dns_ttl,
+                keepalive_timeout=self.keepalive,
+            )
+            self.session = aiohttp.ClientSession(
+                connector=connector,
+                trace_configs=[self._trace_config()],
+            )
+        return self.session
+
+    async def close(self):
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+        self.session = None
+
+    # ═══════════════ Счётчики ═══════════════
+
+    def _trace_config(self) -> aiohttp.TraceConfig:
+        trace = aiohttp.TraceConfig()
+        trace.on_request_start.append(self._on_request_start)
+        trace.on_connection_create_end.append(self._on_connection_created)
+        trace.on_connection_reuseconn.append(self._on_connection_reused)
+        trace.on_dns_cache_hit.append(self._on_dns_hit)
+        trace.on_dns_cache_miss.append(self._on_dns_miss)
+        return trace
+
+    async def _on_request_start(self, session, ctx: SimpleNamespace, params):
+        ctx.secure = params.url.scheme in ("https", "wss")
+        self.requests += 1
+        # Прогрев не продлевает жизнь хосту, WS-стримы не прогреваются
+        prewarm = getattr(ctx.trace_request_ctx, "prewarm", False)
+        if not prewarm and params.url.scheme in ("http", "https"):
+            self._last_used[str(params.url.origin())] = time.monotonic()
+
+    async def _on_connection_created(self, session, ctx: SimpleNamespace, params):
+        self.new_connections += 1
+        if getattr(ctx, "secure", False):
+            self.tls_handshakes += 1
+
+    async def _on_connection_reused(self, session, ctx, params):
+        self.reused += 1
+
+    async def _on_dns_hit(self, session, ctx, params):
+        self.dns_hits += 1
+
+    async def _on_dns_miss(self, session, ctx, params):
+        self.dns_misses += 1
+
+    # ═══════════════ Прогрев ═══════════════
+
+    async def prewarm(self):
+        """
+        Открыть соединения к хостам, простоявшим дольше keep-alive:
+        TCP/TLS-рукопожатие случится здесь, а не на первом запросе цикла.
+        """
+        if self.session is None or self.session.closed:
+            return
+        now = time.monotonic()
+        for origin in [o for o, used in self._last_used.items() if now - used > self.FORGET_AFTER]:
+            del self._last_used[origin]
+            self._warmed.pop(origin, None)
+        idle = [
+            origin for origin, used in self._last_used.items()
+            if now - max(used, self._warmed.get(origin, 0.0)) >= self.keepalive * 0.8
+        ]
+        for origin in idle:
+            self._warmed[origin] = now  # параллельный прогрев не дублирует
+        if idle:
+            await asyncio.gather(*[self._touch(origin) for origin in idle])
+
+    async def _touch(self, origin: str):
+        try:
+            async with self.session.head(
+                URL(origin), allow_redirects=False,
+                timeout=aiohttp.ClientTimeout(total=self.PREWARM_TIMEOUT),
+                trace_request_ctx=SimpleNamespace(prewarm=True),
+            ):
+                self.prewarmed += 1
+        except Exception as e:
+            logger.debug(f"Прогрев {origin}: {e}")
+
+    def get_stats(self) -> dict:
+        total = self.new_connections + self.reused
+        return {
+            "requests": self.requests,
+            "new_connections": self.new_connections,
+            "tls_handshakes": self.tls_handshakes,
+            "reused": self.reused,
+            "reuse_pct": round(self.reused / total * 100, 1) if total else 0.0,
+            "dns_hits": self.dns_hits,
+            "dns_misses": self.dns_misses,
+            "prewarmed": self.prewarmed,
+            "hosts": len(self._last_used),
+        }
@@ -0,0 +1,193 @@
+"""
+venues.py — Нативные bulk-эндпоинты бирж
+Один публичный запрос → данные сразу по ВСЕМ контрактам биржи
+"""
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Tuple
+
+
+@dataclass(frozen=True, slots=True)
+class BulkEndpoint:
+    """
+    Описание bulk-эндпоинта биржи.
+
+    method     — implicit API метод ccxt (например publicGetV5MarketTickers)
+    params     — параметры запроса
+    rows_path  — путь до списка строк в ответе
+    id_field   — поле с market id биржи
+    fields     — наше имя поля → поле в строке ответа
+    contracts  — поля, которые биржа отдаёт в контрактах (× contractSize)
+    id_suffix  — дописать к id строки, чтобы получить market id перпа
+    """
+    method: str
+    params: Dict[str, str] = field(default_factory=dict)
+    rows_path: Tuple[str, ...] = ()
+    id_field: str = "symbol"
+    fields: Dict[str, str] = field(default_factory=dict)
+    contracts: Tuple[str, ...] = ()
+    id_suffix: str = ""
+
+    @property
+    def key(self) -> str:
+        """Ключ ресурса в снапшоте цикла: эндпоинты с общим ответом делят запрос"""
+        params = "&".join(f"{k}={v}" for k, v in sorted(self.params.items()))
+        return f"{self.method}?{params}"
+
+
+# Биржа → её bulk-эндпоинты. OI везде приводится к количеству базового актива,
+# index — индексная цена перпа (спот-композит биржи), price — последняя цена,
+# funding — текущая ставка фандинга (доля, не проценты), next_funding — время
+# ближайшей выплаты (мс), funding_interval_h — интервал выплат (часы).
+# Binance и BingX отдают OI только по одному символу — там только index/price/funding.
+BULK_ENDPOINTS: Dict[str, Tuple[BulkEndpoint, ...]] = {
+    "binance": (
+        BulkEndpoint(
+            method="fapiPublicGetPremiumIndex",
+            fields={"index": "indexPrice", "funding": "lastFundingRate", "next_funding": "nextFundingTime"},
+        ),
+        BulkEndpoint(
+            method="fapiPublicGetTickerPrice",
+            fields={"price": "price"},
+        ),
+    ),
+    "bybit": (
+        BulkEndpoint(
+            method="publicGetV5MarketTickers",
+            params={"category": "linear"},
+            rows_path=("result", "list"),
+            fields={
+                "oi": "openInterest", "index": "indexPrice",
+                "price": "lastPrice", "funding": "fundingRate",
+                "next_funding": "nextFundingTime", "funding_interval_h": "fundingIntervalHour",
+            },
+        ),
+    ),
+    "okx": (
+        BulkEndpoint(
+            method="publicGetPublicOpenInterest",
+            params={"instType": "SWAP"},
+            rows_path=("data",),
+            id_field="instId",
+            fields={"oi": "oiCcy"},
+        ),
+        BulkEndpoint(
+            method="publicGetMarketIndexTickers",
+            params={"quoteCcy": "USDT"},
+            rows_path=("data",),
+            id_field="instId",
+            fields={"index": "idxPx"},
+            id_suffix="-SWAP",
+        ),
+        BulkEndpoint(
+            method="publicGetMarketTickers",
+            params={"instType": "SWAP"},
+            rows_path=("data",),
+            id_field="instId",
+            fields={"price": "last"},
+        ),
+        BulkEndpoint(
+            method="publicGetPublicFundingRate",
+            params={"instId": "ANY"},
+            rows_path=("data",),
+            id_field="instId",
+            fields={"funding": "fundingRate", "next_funding": "fundingTime"},
+        ),
+    ),
+    "bitget": (
+        BulkEndpoint(
+            method="publicMixGetV2MixMarketTickers",
+            params={"productType": "USDT-FUTURES"},
+            rows_path=("data",),
+            fields={
+                "oi": "holdingAmount", "index": "indexPrice",
+                "price": "lastPr", "funding": "fundingRate",
+            },
+        ),
+    ),
+    "mexc": (
+        BulkEndpoint(
+            method="contractPublicGetTicker",
+            rows_path=("data",),
+            fields={
+                "oi": "holdVol", "index": "indexPrice",
+                "price": "lastPrice", "funding": "fundingRate",
+            },
+            contracts=("oi",),
+        ),
+    ),
+    "kucoin": (
+        BulkEndpoint(
+            method="futuresPublicGetContractsActive",
+            rows_path=("data",),
+            fields={
+                "oi": "openInterest", "index": "indexPrice",
+                "price": "lastTradePrice", "funding": "fundingFeeRate",
+            },
+            contracts=("oi",),
+        ),
+    ),
+    "gateio": (
+        BulkEndpoint(
+            method="publicFuturesGetSettleTickers",
+            params={"settle": "usdt"},
+            id_field="contract",
+            fields={
+                "oi": "total_size", "index": "index_price",
+                "price": "last", "funding": "funding_rate",
+            },
+            contracts=("oi",),
+        ),
+    ),
+    "bingx": (
+        BulkEndpoint(
+            method="swapV2PublicGetQuotePremiumIndex",
+            rows_path=("data",),
+            fields={"index": "indexPrice", "funding": "lastFundingRate", "next_funding": "nextFundingTime"},
+        ),
+        BulkEndpoint(
+            method="swapV2PublicGetQuoteTicker",
+            rows_path=("data",),
+            fields={"price": "lastPrice"},
+        ),
+    ),
+}
+
+
+def find_endpoint(eid: str, name: str) -> Optional[BulkEndpoint]:
+    """Первый bulk-эндпоинт биржи, который отдаёт поле name"""
+    for endpoint in BULK_ENDPOINTS.get(eid, ()):
+        if name in endpoint.fields:
+            return endpoint
+    return None
+
+
+def to_float(value: Any) -> Optional[float]:
+    if value is None or value == "":
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def extract_field(endpoint: BulkEndpoint, raw: Any, name: str) -> Dict[str, float]:
+    """
+    Достать одно поле из сырого ответа.
+    Returns: {market_id: value} (в единицах биржи, без умножения на contractSize)
+    """
+    rows = raw
+    for key in endpoint.rows_path:
+        rows = rows.get(key) if isinstance(rows, dict) else None
+    if not isinstance(rows, list):
+        return {}
+
+    src = endpoint.fields[name]
+    id_field = endpoint.id_field
+    suffix = endpoint.id_suffix
+    result = {}
+    for row in rows:
+        market_id = row.get(id_field)
+        value = to_float(row.get(src))
+        if market_id and value is not None:
+            result[market_id + suffix] = value
+    return result